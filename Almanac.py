@@ -0,0 +1,310 @@
+# Almanac cache
+#
+# Everything that is shown once a day - sun rise / set times, moon rise / set and the moon phase - only depends on the date and
+# Config.Location, so it can be worked out ahead of time and kept in a file. After a power cut the clock then has everything it needs
+# straight away instead of sitting on the lunar maths.
+#
+# The file is a header followed by one fixed size record per day, and is memory mapped when loaded so only the days that are asked
+# for are read. It is ignored (and rebuilt) if the location or the version of the calculations it was made with has changed.
+#
+# Day(DAY) gives the almanac for a datetime.date - from the file if it is there, otherwise it is calculated there and then:
+#    {'Sun': as Sun.SunTimes, 'Moon': as Moon.MoonTimes, 'Phase': index into Moon.PhaseNames}
+#
+# As the Pi is slow, the file can be built on something faster and copied across:
+#    python3 Almanac.py --start 2025-01-01 --end 2026-12-31 [--location LAT LON] [--output FILE] [--workers N] [--dump]
+# The file only depends on the location, dates and calculations, so building it twice gives the same file - --dump prints it as text
+# so that files made before and after a change to the calculations can be compared with diff.
+#
+# For many clocks, one box can build the files for all the sites in Config.Sites - one file per site, named after it, in a folder:
+#    python3 Almanac.py --sites --start 2025-01-01 --end 2026-12-31 [--output FOLDER] [--workers N]
+# The days are shared out between the processes in runs, and each process works out every site for its days - so the things that only
+# depend on the date (the moon phase, and the moon's position at the start of each day) are worked out once for all the sites.
+
+import os
+import sys
+import argparse
+import concurrent.futures
+import math
+import mmap
+import struct
+import datetime as dt
+
+import Config
+import Sun
+import Moon
+
+# change this whenever the Sun or Moon calculations change, so that files made with the old ones are not used
+#    2 - sun set times worked out from the setting hour angle (they used the rising one)
+AlgorithmVersion = 2
+
+# header is [file id, file format version, AlgorithmVersion, latitude, longitude, first day (as a date ordinal), number of days]
+Header = struct.Struct('<4sHHddiI')
+FileId = b'PICA'
+FormatVersion = 1
+
+# each day is [rise, set for each of Sun.zenith_labels (nan for no event), Moon Rise, Set, Transit (seconds into the day, -1 for no event), moon phase]
+Record = struct.Struct('<%ddiiiB' % (2 * len(Sun.zenith_labels)))
+
+# the almanac is always worked out with Moon set up like this, so that what is in a file doesn't depend on how Moon happens to be set up
+# (Benchmark, for one, tries the others) - change AlgorithmVersion if these are changed
+MoonSettings = {'MoonSolver':"Iterate",'PositionMode':"Exact",'PositionQuantum':0}
+
+# the currently loaded file - the memory map, first day (as a date ordinal) and number of days in it
+CacheMap = None
+CacheStart = 0
+CacheCount = 0
+
+def CachePath():
+    # Config.AlmanacFile is relative to the PiClock folder unless it is a full path
+    return(os.path.join(os.path.dirname(os.path.abspath(__file__)),Config.AlmanacFile))
+
+def MoonCall(f,*args,**kwargs):
+    # call one of Moon's functions with Moon set up as MoonSettings, and put back whatever it was set up as afterwards
+    saved = {i:getattr(Moon,i) for i in MoonSettings}
+
+    for i in MoonSettings:
+        setattr(Moon,i,MoonSettings[i])
+
+    try:
+        return(f(*args,**kwargs))
+    finally:
+        for i in saved:
+            setattr(Moon,i,saved[i])
+
+def ComputeDay(DAY,Location = Config.Location,Events = Moon.MoonEvents):
+    # work out the almanac for a day - only the moon Events asked for (a record for the file needs all of them)
+    # Moon expects Longitude to be positive in the West
+    sun = Sun.SunTimes(DAY.year,DAY.month,DAY.day,Location[0],Location[1])
+    moon = MoonCall(Moon.MoonTimes,DAY.year,DAY.month,DAY.day,Location[0],-Location[1],Events = Events)
+    phase = Moon.PhaseOfDay(DAY.year,DAY.month,DAY.day)
+
+    return({'Sun':sun,'Moon':moon,'Phase':phase})
+
+def Pack(almanac):
+    # turn the almanac for a day into a record for the file
+    sun = [math.nan if i is False else i for j in Sun.zenith_labels for i in almanac['Sun'][j]]
+    moon = [-1 if almanac['Moon'][i] is False else (almanac['Moon'][i][0] * 3600) + (almanac['Moon'][i][1] * 60) + almanac['Moon'][i][2] for i in Moon.MoonEvents]
+
+    return(Record.pack(*sun,*moon,almanac['Phase']))
+
+def Unpack(buffer,offset = 0):
+    # turn a record from the file back into the almanac for a day
+    values = Record.unpack_from(buffer,offset)
+
+    sun = [False if math.isnan(i) else i for i in values[:2 * len(Sun.zenith_labels)]]
+    sun = dict(zip(Sun.zenith_labels,[(sun[2 * i],sun[(2 * i) + 1]) for i in range(len(Sun.zenith_labels))]))
+
+    moon = values[2 * len(Sun.zenith_labels):-1]
+    moon = dict(zip(Moon.MoonEvents,[False if i < 0 else (i // 3600,(i // 60) % 60,i % 60) for i in moon]))
+
+    return({'Sun':sun,'Moon':moon,'Phase':values[-1]})
+
+def Write(start,records,Location = Config.Location,path = None):
+    # write a file of already packed records, the first of which is for the date start
+    # written to a temporary file first and then swapped in, so that a power cut part way through can't leave half a file
+    if path == None:
+        path = CachePath()
+
+    with open(path + '.tmp','wb') as f:
+        f.write(Header.pack(FileId,FormatVersion,AlgorithmVersion,Location[0],Location[1],start.toordinal(),len(records)))
+        f.write(b''.join(records))
+
+    os.replace(path + '.tmp',path)
+
+def PackDay(DAY,Location):
+    # work out and pack the almanac for a day - for Build to hand out to other processes
+    return(Pack(ComputeDay(DAY,Location)))
+
+def Build(start,days,Location = Config.Location,path = None,Workers = 1):
+    # work out the almanac for a number of days from start and write it to the file
+    # with more than 1 Worker the days are shared out between that many processes (None for one per CPU)
+    dates = [start + dt.timedelta(days = i) for i in range(days)]
+
+    if Workers == 1:
+        records = [PackDay(i,Location) for i in dates]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = Workers) as pool:
+            # hand the days out in chunks - each day is only a few ms of work
+            records = list(pool.map(PackDay,dates,[Location] * days,chunksize = 32))
+
+    Write(start,records,Location,path)
+
+def PackSites(dates,Sites):
+    # work out and pack the almanac for a run of consecutive days at each site - for BuildSites to hand out to other processes
+    # returns {site name: [packed record for each day]}
+    # the moon's positions at 0h of each day are shared between the sites through Moon's position memo
+    phases = [Moon.PhaseOfDay(i.year,i.month,i.day) for i in dates]
+
+    out = {}
+
+    for name, Location in Sites.items():
+        # Moon expects Longitude to be positive in the West
+        # MoonTimesRange is a generator, so it has to be run through inside MoonCall
+        moon = MoonCall(lambda: [i[1] for i in Moon.MoonTimesRange(dates[0],dates[-1],Location[0],-Location[1])])
+
+        out[name] = [Pack({'Sun':Sun.SunTimes(dates[i].year,dates[i].month,dates[i].day,Location[0],Location[1]),'Moon':moon[i],'Phase':phases[i]})
+                     for i in range(len(dates))]
+
+    return(out)
+
+def SitePath(name,folder = '.'):
+    return(os.path.join(folder,name + '.bin'))
+
+def BuildSites(start,days,Sites = Config.Sites,folder = '.',Workers = 1,Chunk = 32):
+    # work out the almanac for a number of days from start at each of Sites (name: [latitude, longitude]) and write a file for each
+    # to folder. The days are handed out Chunk at a time - with more than 1 Worker to that many processes (None for one per CPU)
+    dates = [start + dt.timedelta(days = i) for i in range(days)]
+    chunks = [dates[i:i + Chunk] for i in range(0,days,Chunk)]
+
+    if Workers == 1:
+        results = [PackSites(i,Sites) for i in chunks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = Workers) as pool:
+            results = list(pool.map(PackSites,chunks,[Sites] * len(chunks)))
+
+    os.makedirs(folder,exist_ok = True)
+
+    for name in Sites:
+        Write(start,[j for i in results for j in i[name]],Sites[name],SitePath(name,folder))
+
+def Load(Location = Config.Location,path = None):
+    # memory map the file if it is there and was made for this location and version of the calculations
+    # returns True if it was loaded
+    global CacheMap, CacheStart, CacheCount
+
+    if path == None:
+        path = CachePath()
+
+    Unload()
+
+    try:
+        with open(path,'rb') as f:
+            m = mmap.mmap(f.fileno(),0,access = mmap.ACCESS_READ)
+    except (OSError,ValueError):
+        return(False)
+
+    if len(m) < Header.size:
+        m.close()
+        return(False)
+
+    fileid,formatversion,algorithmversion,latitude,longitude,start,count = Header.unpack_from(m)
+
+    if (fileid != FileId) or (formatversion != FormatVersion) or (algorithmversion != AlgorithmVersion) \
+            or (latitude != Location[0]) or (longitude != Location[1]) or (len(m) < Header.size + (count * Record.size)):
+        m.close()
+        return(False)
+
+    CacheMap = m
+    CacheStart = start
+    CacheCount = count
+
+    return(True)
+
+def Unload():
+    global CacheMap, CacheStart, CacheCount
+
+    if CacheMap != None:
+        CacheMap.close()
+
+    CacheMap = None
+    CacheStart = 0
+    CacheCount = 0
+
+def Cached(DAY):
+    # True if the day is in the loaded file
+    return((CacheMap != None) and (0 <= DAY.toordinal() - CacheStart < CacheCount))
+
+def Day(DAY,Events = Moon.MoonEvents):
+    # the almanac for a day - from the file if it is in there (with all the moon events), otherwise work it out with just the moon Events
+    if Cached(DAY):
+        return(Unpack(CacheMap,Header.size + ((DAY.toordinal() - CacheStart) * Record.size)))
+
+    return(ComputeDay(DAY,Events = Events))
+
+def Update(DAY,Chunk = 7,Location = Config.Location,path = None):
+    # top up the file so that it runs from DAY for Config.AlmanacDays, working out no more than Chunk new days each time so the clock isn't held up
+    # days before DAY are dropped. Returns the number of days worked out.
+    records = []
+
+    # keep whatever is already there from DAY onwards
+    if Cached(DAY):
+        first = Header.size + ((DAY.toordinal() - CacheStart) * Record.size)
+        records = [CacheMap[i:i + Record.size] for i in range(first,Header.size + (CacheCount * Record.size),Record.size)]
+
+    # a file that starts after DAY (i.e. built elsewhere from a later --start) is kept - only the days in front of it are worked out,
+    # and if there are more than Chunk of them it is left alone and Day works out the days that aren't in it
+    elif (CacheMap != None) and (CacheStart > DAY.toordinal()):
+        gap = CacheStart - DAY.toordinal()
+
+        if gap > Chunk:
+            return(0)
+
+        records = [Pack(ComputeDay(DAY + dt.timedelta(days = i),Location)) for i in range(gap)]
+        records += [CacheMap[i:i + Record.size] for i in range(Header.size,Header.size + (CacheCount * Record.size),Record.size)]
+
+        Unload()
+        Write(DAY,records,Location,path)
+        Load(Location,path)
+
+        return(gap)
+
+    new = min(Chunk,Config.AlmanacDays - len(records))
+
+    if new <= 0:
+        return(0)
+
+    for i in range(len(records),len(records) + new):
+        records.append(Pack(ComputeDay(DAY + dt.timedelta(days = i),Location)))
+
+    Unload()
+    Write(DAY,records,Location,path)
+    Load(Location,path)
+
+    return(new)
+
+def Dump(path = None,out = sys.stdout):
+    # print a file one day per line: date, sun rise / set for each of Sun.zenith_labels, moon rise, set, transit and phase
+    # the header isn't checked against Config, so any almanac file can be dumped
+    if path == None:
+        path = CachePath()
+
+    with open(path,'rb') as f:
+        buffer = f.read()
+
+    fileid,formatversion,algorithmversion,latitude,longitude,start,count = Header.unpack_from(buffer)
+
+    print("# PiClock almanac - format", formatversion, "algorithms", algorithmversion, "location", latitude, longitude, file = out)
+
+    for i in range(count):
+        almanac = Unpack(buffer,Header.size + (i * Record.size))
+
+        sun = ["-" if j is False else "%.6f" % j for k in Sun.zenith_labels for j in almanac['Sun'][k]]
+        moon = ["-" if almanac['Moon'][k] is False else "%02d:%02d:%02d" % almanac['Moon'][k] for k in Moon.MoonEvents]
+
+        print(dt.date.fromordinal(start + i).isoformat(),*sun,*moon,Moon.PhaseNames[almanac['Phase']], file = out)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Build the almanac file of sun and moon data for the clock")
+    parser.add_argument("--start", type = dt.date.fromisoformat, default = dt.date.today(), help = "first day, YYYY-MM-DD (default today)")
+    parser.add_argument("--end", type = dt.date.fromisoformat, help = "last day, YYYY-MM-DD (default Config.AlmanacDays from start)")
+    parser.add_argument("--location", type = float, nargs = 2, metavar = ("LAT","LON"), default = Config.Location, help = "latitude and longitude in decimal degrees (default Config.Location)")
+    parser.add_argument("--output", default = None, help = "file to write (default Config.AlmanacFile), or folder with --sites (default the current one)")
+    parser.add_argument("--workers", type = int, default = None, help = "number of processes to use (default one per CPU)")
+    parser.add_argument("--dump", action = "store_true", help = "print the file as text instead of building it")
+    parser.add_argument("--sites", action = "store_true", help = "build a file for each of Config.Sites instead of the one location")
+    args = parser.parse_args()
+
+    if args.dump:
+        Dump(args.output)
+        sys.exit()
+
+    if args.end == None:
+        days = Config.AlmanacDays
+    else:
+        days = (args.end - args.start).days + 1
+
+    if args.sites:
+        BuildSites(args.start,days,Config.Sites,args.output or '.',args.workers)
+    else:
+        Build(args.start,days,args.location,args.output,args.workers)
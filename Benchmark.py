@@ -0,0 +1,201 @@
+# Benchmarks for the almanac calculations and the display loop
+#
+# Run on the Pi (or anywhere else) with: python3 Benchmark.py [days]
+# Almanac times are the average cost per day over a run of days starting today, at the location in Config - for the moon solvers
+# accuracy against each other over several years, give it a few years of days (i.e. 1461).
+# The display loop is run for a day's worth of frames on the simulated hardware (see Hardware.py), so it needs no devices either.
+
+import os
+import sys
+import datetime as dt
+import time as tm
+
+import Config
+import Moon
+import Sun
+
+def Days(n):
+    # list of n dates starting today
+    START = dt.date.today()
+    return([START + dt.timedelta(days = i) for i in range(n)])
+
+def PerDay(f,days):
+    # average time in ms per day of running f(YEAR,MONTH,DAY) over the days given
+    t_0 = tm.perf_counter()
+
+    for DAY in days:
+        f(DAY.year,DAY.month,DAY.day)
+
+    return((tm.perf_counter() - t_0) * 1000 / len(days))
+
+def BestPerDay(f,days,Repeats = 5):
+    # best of Repeats runs of PerDay - each run starts with an empty position memo, so none of them gets the positions worked out by
+    # the one before
+    times = []
+
+    for i in range(Repeats):
+        Moon.ClearPositionCache()
+        times.append(PerDay(f,days))
+
+    return(min(times))
+
+def Lookups(f,days):
+    # run f(YEAR,MONTH,DAY) over the days given from an empty position memo - returns the results and the average number of moon
+    # positions looked up (worked out or found in the memo) per day. Unlike the time, this is the same every run
+    Moon.ClearPositionCache()
+    results = [f(DAY.year,DAY.month,DAY.day) for DAY in days]
+
+    return(results,(Moon.PositionHits + Moon.PositionMisses) / len(days))
+
+def MoonBenchmark(days):
+    # before - one MoonTime per event, as MainCtl used to; after - one MoonTimes for the same events
+    # the times are only printed - the two are close enough for which one wins to change from run to run. Returns True if MoonTimes
+    # gives the same Rise + Set as MoonTime (which is what the clock works out when a day isn't in the almanac file) from fewer positions
+    LAT = Config.Location[0]
+    LON = -Config.Location[1]
+
+    rise_set = lambda y,m,d: {i:Moon.MoonTime(y,m,d,LAT,LON,i) for i in ("Rise","Set")}
+    times_rise_set = lambda y,m,d: Moon.MoonTimes(y,m,d,LAT,LON,Events = ("Rise","Set"))
+
+    before = BestPerDay(rise_set,days)
+    after = BestPerDay(times_rise_set,days)
+    before_transit = BestPerDay(lambda y,m,d: (Moon.MoonTime(y,m,d,LAT,LON,"Rise"),Moon.MoonTime(y,m,d,LAT,LON,"Set"),Moon.MoonTime(y,m,d,LAT,LON,"Transit")),days)
+    after_transit = BestPerDay(lambda y,m,d: Moon.MoonTimes(y,m,d,LAT,LON),days)
+
+    before_results, before_lookups = Lookups(rise_set,days)
+    after_results, after_lookups = Lookups(times_rise_set,days)
+
+    print("Moon, ms per day over", len(days), "days")
+    print("  MoonTime Rise + Set:          ", round(before,2))
+    print("  MoonTimes Rise + Set:         ", round(after,2))
+    print("  MoonTime Rise + Set + Transit:", round(before_transit,2))
+    print("  MoonTimes (all three):        ", round(after_transit,2))
+    print("  positions looked up per day for Rise + Set, MoonTime / MoonTimes:", round(before_lookups,1), "/", round(after_lookups,1))
+
+    return((after_results == before_results) and (after_lookups < before_lookups))
+
+def PositionBenchmark(days):
+    # MoonTimes with each of Moon's PositionModes - time, full position evaluations and memo hits per day, and how far apart the times are
+    LAT = Config.Location[0]
+    LON = -Config.Location[1]
+
+    results = {}
+
+    print("Moon positions, per day over", len(days), "days")
+
+    for mode in ("Exact","Interpolate"):
+        Moon.PositionMode = mode
+        Moon.ClearPositionCache()
+
+        t_0 = tm.perf_counter()
+        results[mode] = [Moon.MoonTimes(DAY.year,DAY.month,DAY.day,LAT,LON) for DAY in days]
+        t = (tm.perf_counter() - t_0) * 1000 / len(days)
+
+        print("  " + (mode + ":").ljust(13), round(t,2), "ms,", round(Moon.PositionMisses / len(days),1), "evaluations,", round(Moon.PositionHits / len(days),1), "memo hits")
+
+    Moon.PositionMode = "Exact"
+
+    # difference in seconds between the modes, for the events that both have
+    seconds = lambda x: (x[0] * 3600) + (x[1] * 60) + x[2]
+    diffs = [abs(seconds(i[j]) - seconds(k[j])) for i, k in zip(results["Exact"],results["Interpolate"]) for j in Moon.MoonEvents if (i[j] is not False) and (k[j] is not False)]
+    missed = sum((i[j] is False) != (k[j] is False) for i, k in zip(results["Exact"],results["Interpolate"]) for j in Moon.MoonEvents)
+
+    print("  Interpolate vs Exact: worst", max(diffs), "s, mean", round(sum(diffs) / len(diffs),2), "s,", missed, "events found by only one")
+
+def SolverBenchmark(days):
+    # MoonTimesRange over the days with each of Moon's MoonSolvers - time and position evaluations per day, and how far apart the times are
+    # for the accuracy over several years, give it a few years of days, i.e. python3 Benchmark.py 1461
+    LAT = Config.Location[0]
+    LON = -Config.Location[1]
+
+    results = {}
+
+    print("Moon solvers, per day over", len(days), "days")
+
+    for solver in ("Iterate","Tabular"):
+        Moon.MoonSolver = solver
+        Moon.ClearPositionCache()
+
+        t_0 = tm.perf_counter()
+        results[solver] = [i[1] for i in Moon.MoonTimesRange(days[0],days[-1],LAT,LON)]
+        t = (tm.perf_counter() - t_0) * 1000 / len(days)
+
+        print("  " + (solver + ":").ljust(9), round(t,2), "ms,", round(Moon.PositionMisses / len(days),1), "evaluations")
+
+    Moon.MoonSolver = "Iterate"
+
+    # difference in seconds between the solvers, for the events that both have
+    seconds = lambda x: (x[0] * 3600) + (x[1] * 60) + x[2]
+    diffs = sorted(abs(seconds(i[j]) - seconds(k[j])) for i, k in zip(results["Iterate"],results["Tabular"]) for j in Moon.MoonEvents if (i[j] is not False) and (k[j] is not False))
+    missed = sum((i[j] is False) != (k[j] is False) for i, k in zip(results["Iterate"],results["Tabular"]) for j in Moon.MoonEvents)
+
+    print("  Tabular vs Iterate: worst", diffs[-1], "s, median", diffs[len(diffs) // 2], "s, mean", round(sum(diffs) / len(diffs),2), "s,", missed, "events found by only one")
+
+def PhaseBenchmark(days):
+    # before - the 4 cardinal phases worked out for each day with Phase, as PhaseOfDay used to; after - PhaseOfDay from the phase tracker
+    before = PerDay(lambda y,m,d: Moon.Phase(y + ((Moon.JulianDay(y,m,d) - Moon.JulianDay(y,1,1)) / 365)),days)
+
+    Moon.ClearPhases()
+    after = PerDay(Moon.PhaseOfDay,days)
+
+    print("Moon phase, ms per day over", len(days), "days")
+    print("  Phase:               ", round(before,4))
+    print("  PhaseOfDay (tracker):", round(after,4), "-", len(Moon.PhaseJDE) // 4, "lunations worked out")
+
+def SunBenchmark(days):
+    # before - one SunTimes per day; after - one SunTimesBatch for all the days, with and without NumPy
+    LAT = Config.Location[0]
+    LON = Config.Location[1]
+
+    before = PerDay(lambda y,m,d: Sun.SunTimes(y,m,d,LAT,LON),days)
+
+    t_0 = tm.perf_counter()
+    Sun.SunTimesBatch(days,LAT,LON)
+    after = (tm.perf_counter() - t_0) * 1000 / len(days)
+
+    print("Sun, ms per day over", len(days), "days")
+    print("  SunTimes:     ", round(before,4))
+    print("  SunTimesBatch:", round(after,4), "(NumPy)" if Sun.UseNumPy else "(pure Python)")
+
+def FrameBenchmark(frames):
+    # time MainCtl's display update over a number of frames (seconds) from midnight today, on the simulated hardware
+    os.environ["PICLOCK_HARDWARE"] = "Sim"
+
+    import Hardware
+    import Sensor
+    import MainCtl
+
+    START = dt.datetime.combine(dt.date.today(),dt.time())
+
+    MainCtl.show_day(MainCtl.day_values(START.date()))
+    MainCtl.show_weather(Sensor.Read())
+
+    times = []
+
+    for i in range(frames):
+        t_0 = tm.perf_counter()
+        MainCtl.second_update(START + dt.timedelta(seconds = i))
+        times.append((tm.perf_counter() - t_0) * 1000)
+
+    times.sort()
+
+    print("Display loop, over", frames, "frames")
+    print("  ms per frame, mean / median / worst:", round(sum(times) / frames,3), "/", round(times[frames // 2],3), "/", round(times[-1],3))
+    print("  i2c writes / bytes per frame:       ", round(Hardware.SimWrites / frames,2), "/", round(Hardware.SimBytes / frames,2))
+
+if __name__ == "__main__":
+
+    if len(sys.argv) > 1:
+        n = int(sys.argv[1])
+    else:
+        n = 30
+
+    moon = MoonBenchmark(Days(n))
+    PositionBenchmark(Days(n))
+    SolverBenchmark(Days(n))
+    PhaseBenchmark(Days(n))
+    SunBenchmark(Days(n))
+    FrameBenchmark(86400)
+
+    if not moon:
+        raise SystemExit("MoonTimes didn't give MoonTime's Rise + Set from fewer positions")
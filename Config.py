@@ -1,5 +1,8 @@
 # location based values here
 Location = [55.885,-3.764]
+
+# sites to build almanac files for with python3 Almanac.py --sites - name: [latitude, longitude]
+Sites = {'Home':Location}
 MetersAboveSeaLevel=185
 
 # port of the i2c bus - 0 on very very old Pi's; 1 on the rest
@@ -11,3 +14,23 @@ BME280 = 76
 HT16K33 = [70,71]
 DS3231 = 68
 
+
+# hardware - "Pi" for the real devices, "Sim" to run without any (see Hardware.py), and the BME280 readings the Sim backend replays
+Hardware = "Pi"
+SimReadings = "readings.csv"
+
+# BME280 - seconds a reading is kept before the sensor is read again, oversampling (1, 2, 4, 8 or 16 samples per measurement) and seconds
+# to wait before trying again if reading it fails
+SensorInterval = 6
+SensorOversampling = 1
+SensorRetry = 30
+
+# BME280 history - minutes of readings kept (one a minute), the file it is saved to (relative to the PiClock folder) and how often, in minutes
+HistoryMinutes = 1440
+HistoryFile = "history.bin"
+HistorySnapshot = 15
+
+
+# almanac cache - file of precomputed sun / moon data (relative to the PiClock folder) and how many days ahead to keep in it
+AlmanacFile = "almanac.bin"
+AlmanacDays = 730
@@ -0,0 +1,123 @@
+# Hardware
+#
+# Everything that talks to a device goes through here, so the rest of the clock doesn't need to know if it is running on the Pi or not.
+# Config.Hardware picks the backend (the PICLOCK_HARDWARE environment variable overrides it, i.e. PICLOCK_HARDWARE=Sim python3 MainCtl.py):
+#    "Pi"  - the HT16K33s through adafruit_ht16k33 and the BME280 through smbus2 / RPi.BME280
+#    "Sim" - no hardware at all: each HT16K33 is a 16 byte copy of its display RAM in SimRAM, and the BME280 replays readings recorded in
+#            Config.SimReadings (a CSV of temperature,humidity,pressure per line, in a loop) - or SimReading if there is no file
+# The device libraries are only imported for the Pi backend, so with Sim the clock runs (and can be profiled) on any Linux box.
+#
+# Displays are opened with DisplayOpen(address) and written with DisplayWrite(display,data) - data is the display RAM address to start at
+# followed by the bytes to store from there on. The sensor is opened with SensorOpen() and read with SensorRead(sensor,oversampling), which
+# gives something with .temperature, .humidity and .pressure as bme280.sample does. The clock reads it through Sensor.py, which caches it.
+
+import os
+import csv
+import types
+
+import Config
+
+Backend = os.environ.get("PICLOCK_HARDWARE",Config.Hardware)
+
+if Backend not in ("Pi","Sim"):
+    raise SystemExit("Unknown hardware backend " + str(Backend) + " - should be Pi or Sim")
+
+# the i2c bus for the Pi backend - opened when the first device is
+I2C = None
+
+# simulated display RAM by i2c address, and the number of i2c writes / bytes written to the simulated displays
+SimRAM = {}
+SimWrites = 0
+SimBytes = 0
+
+# simulated BME280 - readings to replay and the next one to give, and the reading to give if there aren't any
+SimReadings = []
+SimNext = 0
+SimReading = (15.0,50.0,1013.25)
+
+def Bus():
+    # the i2c bus on the Pi, opened the first time it is needed
+    global I2C
+
+    if I2C == None:
+        import board
+        I2C = board.I2C()
+
+    return(I2C)
+
+def DisplayOpen(address,brightness = 0.05):
+    # open the HT16K33 at an i2c address (an int), blanked
+    if Backend == "Sim":
+        SimRAM[address] = bytearray(16)
+        return(address)
+
+    from adafruit_ht16k33 import matrix
+
+    display = matrix.Matrix16x8(Bus(),address = address,auto_write = False)
+    display.fill(0)
+    display.brightness = brightness
+
+    return(display)
+
+def DisplayWrite(display,data):
+    # write data (display RAM address to start at, then the bytes to store) to an HT16K33 in one i2c transfer
+    global SimWrites, SimBytes
+
+    if Backend == "Sim":
+        # the HT16K33 auto-increments the address as it stores the bytes
+        SimRAM[display][data[0]:data[0] + len(data) - 1] = data[1:]
+        SimWrites += 1
+        SimBytes += len(data)
+        return
+
+    # newer versions of adafruit_ht16k33 keep a list of i2c devices
+    dev = display.i2c_device
+
+    if isinstance(dev,list):
+        dev = dev[0]
+
+    with dev:
+        dev.write(data)
+
+def SensorOpen(port = Config.I2CPort,address = Config.BME280):
+    # open the BME280 - the address needs to be base16 integer but is stored in Config as a string / decimal looking number
+    global SimReadings, SimNext
+
+    if Backend == "Sim":
+        SimReadings = []
+        SimNext = 0
+
+        # relative to the PiClock folder unless it is a full path
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),Config.SimReadings)
+
+        if os.path.exists(path):
+            with open(path,newline = '') as f:
+                SimReadings = [tuple(float(j) for j in i) for i in csv.reader(f) if len(i) == 3]
+
+        # anything but None, so Sensor.Open knows it is open and doesn't start the readings over again
+        return("Sim")
+
+    import smbus2
+    import bme280
+
+    bus = smbus2.SMBus(int(port))
+    address = int(str(address),16)
+
+    return((bus,address,bme280.load_calibration_params(bus,address)))
+
+def SensorRead(sensor,oversampling = 1):
+    # take a reading from the BME280 - oversampling is 1, 2, 4, 8 or 16 samples per measurement
+    global SimNext
+
+    if Backend == "Sim":
+        if len(SimReadings) == 0:
+            reading = SimReading
+        else:
+            reading = SimReadings[SimNext]
+            SimNext = (SimNext + 1) % len(SimReadings)
+
+        return(types.SimpleNamespace(temperature = reading[0],humidity = reading[1],pressure = reading[2]))
+
+    import bme280
+
+    return(bme280.sample(*sensor,sampling = getattr(bme280.oversampling,'x' + str(oversampling))))
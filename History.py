@@ -0,0 +1,266 @@
+# Sensor history
+#
+# A rolling history of BME280 readings - Config.HistoryMinutes of them, one a minute, so 24 hours by default - for the day's min / max
+# temperature and the pressure tendency (what a barometer is for).
+#
+# Readings are kept in a ring: an array per value plus one of the times, so each reading takes 20 bytes, and adding one overwrites the
+# oldest once the ring is full. Readings older than the length of the history are dropped as well, so gaps (i.e. the clock being off)
+# don't stretch it. The min / max / mean are kept up to date as readings come and go rather than by going through the whole history:
+# running totals for the mean, and for min / max a queue per value of the readings that could still be the min (or max) - each reading
+# goes in and out of those once, so adding one is O(1) on average.
+#
+# Add(reading,when) adds a reading (anything with .temperature, .humidity and .pressure) taken at when (seconds since the epoch), then
+# Min(value), Max(value) and Mean(value) - value being 'temperature', 'humidity' or 'pressure' - and Tendency(hours) for the change in
+# pressure over the last few hours, with TendencyName(change) to describe it.
+#
+# Snapshot() writes the history to Config.HistoryFile and Restore() reads it back, so it survives a restart.
+
+import os
+import array
+import struct
+import collections
+
+import Config
+
+Values = ('temperature','humidity','pressure')
+
+# a reading as restored from a snapshot
+Reading = collections.namedtuple('Reading',Values)
+
+# the ring - oldest reading is at Start, Count readings in it; Seq is the number of readings ever added, so reading n (counting from
+# the first ever added) is in slot n % Size
+Size = Config.HistoryMinutes
+Length = Config.HistoryMinutes * 60
+
+Times = array.array('q',bytes(8 * Size))
+Data = {i:array.array('f',bytes(4 * Size)) for i in Values}
+
+Start = 0
+Count = 0
+Seq = 0
+
+# running totals for the mean, and the min / max queues of (reading number, value)
+Totals = {i:0.0 for i in Values}
+Mins = {i:collections.deque() for i in Values}
+Maxs = {i:collections.deque() for i in Values}
+
+# file is [file id, file format version, number of readings] then the times and each of Values for the readings, oldest first
+Header = struct.Struct('<4sHI')
+FileId = b'PICH'
+FormatVersion = 1
+
+# pressure tendency over 3 hours, in hPa - a change smaller than each limit gets that name (Met Office terms)
+Tendencies = ((0.1,"Steady"),(1.6,"Slowly"),(3.6,""),(6.0,"Quickly"),(float('inf'),"Very rapidly"))
+
+def Clear():
+    global Start, Count, Seq
+
+    Start = 0
+    Count = 0
+    Seq = 0
+
+    for i in Values:
+        Totals[i] = 0.0
+        Mins[i].clear()
+        Maxs[i].clear()
+
+def Drop():
+    # drop the oldest reading
+    global Start, Count
+
+    first = Seq - Count
+
+    for i in Values:
+        Totals[i] -= Data[i][Start]
+
+        if Mins[i][0][0] == first:
+            Mins[i].popleft()
+
+        if Maxs[i][0][0] == first:
+            Maxs[i].popleft()
+
+    Start = (Start + 1) % Size
+    Count -= 1
+
+def Expire(now):
+    # drop the readings that are older than the length of the history
+    while (Count > 0) and (Times[Start] <= now - Length):
+        Drop()
+
+def Add(reading,when):
+    # add a reading taken at when (seconds since the epoch)
+    global Count, Seq
+
+    Expire(when)
+
+    if Count == Size:
+        Drop()
+
+    slot = Seq % Size
+    Times[slot] = int(when)
+
+    for i in Values:
+        Data[i][slot] = getattr(reading,i)
+
+        # use the value as stored, so the totals take off exactly what they put on
+        value = Data[i][slot]
+        Totals[i] += value
+
+        # anything that isn't less than this reading can't be the min any more while this reading is in the history - and the same for max
+        while (len(Mins[i]) > 0) and (Mins[i][-1][1] >= value):
+            Mins[i].pop()
+        Mins[i].append((Seq,value))
+
+        while (len(Maxs[i]) > 0) and (Maxs[i][-1][1] <= value):
+            Maxs[i].pop()
+        Maxs[i].append((Seq,value))
+
+    Count += 1
+    Seq += 1
+
+def Min(value):
+    # lowest of a value in the history, None if it is empty
+    if Count == 0:
+        return(None)
+
+    return(Mins[value][0][1])
+
+def Max(value):
+    # highest of a value in the history, None if it is empty
+    if Count == 0:
+        return(None)
+
+    return(Maxs[value][0][1])
+
+def Mean(value):
+    # mean of a value over the history, None if it is empty
+    if Count == 0:
+        return(None)
+
+    return(Totals[value] / Count)
+
+def Latest():
+    # (time, {value: reading}) of the newest reading, None if the history is empty
+    if Count == 0:
+        return(None)
+
+    slot = (Seq - 1) % Size
+
+    return((Times[slot],{i:Data[i][slot] for i in Values}))
+
+def Tendency(hours = 3,Slack = 300):
+    # change in pressure (hPa) from the reading hours ago to the newest - None if there isn't a reading within Slack seconds of then
+    if Count == 0:
+        return(None)
+
+    newest = (Seq - 1) % Size
+    back = hours * 60
+
+    # one reading a minute, so the reading hours ago is normally back readings before the newest - but there may have been gaps
+    if back < Count:
+        slot = (Seq - 1 - back) % Size
+
+        if abs((Times[newest] - Times[slot]) - (hours * 3600)) <= Slack:
+            return(Data['pressure'][newest] - Data['pressure'][slot])
+
+    return(None)
+
+def TendencyName(change):
+    # describe a 3 hour pressure tendency, i.e. "Rising quickly"
+    if change == None:
+        return("Unknown")
+
+    for limit, name in Tendencies:
+        if abs(change) < limit:
+            break
+
+    if name == "Steady":
+        return(name)
+
+    if change > 0:
+        direction = "Rising"
+    else:
+        direction = "Falling"
+
+    if name == "":
+        return(direction)
+
+    return(direction + " " + name.lower())
+
+def HistoryPath(path = None):
+    # Config.HistoryFile is relative to the PiClock folder unless it is a full path
+    if path == None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),Config.HistoryFile)
+
+    return(path)
+
+def Pack():
+    # the history as the contents of a snapshot file
+    slots = [(Start + i) % Size for i in range(Count)]
+
+    data = [Header.pack(FileId,FormatVersion,Count),array.array('q',[Times[i] for i in slots]).tobytes()]
+
+    for j in Values:
+        data.append(array.array('f',[Data[j][i] for i in slots]).tobytes())
+
+    return(b''.join(data))
+
+def Write(data,path = None):
+    # write a packed snapshot - to a temporary file first and then swapped in, so a power cut can't leave half a file
+    path = HistoryPath(path)
+
+    with open(path + '.tmp','wb') as f:
+        f.write(data)
+
+    os.replace(path + '.tmp',path)
+
+def Snapshot(path = None):
+    Write(Pack(),path)
+
+def Restore(path = None,now = None):
+    # read the history back from a snapshot - returns the number of readings restored. Readings too old to still be in the history are
+    # dropped (now is seconds since the epoch, default the newest reading)
+    path = HistoryPath(path)
+
+    Clear()
+
+    try:
+        with open(path,'rb') as f:
+            buffer = f.read()
+    except OSError:
+        return(0)
+
+    if len(buffer) < Header.size:
+        return(0)
+
+    fileid,formatversion,count = Header.unpack_from(buffer)
+
+    if (fileid != FileId) or (formatversion != FormatVersion) or (len(buffer) != Header.size + (count * 20)):
+        return(0)
+
+    times = array.array('q')
+    times.frombytes(buffer[Header.size:Header.size + (count * 8)])
+
+    data = {}
+    offset = Header.size + (count * 8)
+
+    for i in Values:
+        data[i] = array.array('f')
+        data[i].frombytes(buffer[offset:offset + (count * 4)])
+        offset += count * 4
+
+    # only the newest readings fit if the history has been made shorter
+    for j in range(max(0,count - Size),count):
+        Add(ReadingOf(data,j),times[j])
+
+    if count > 0:
+        if now == None:
+            now = times[-1]
+
+        Expire(now)
+
+    return(Count)
+
+def ReadingOf(data,i):
+    # reading i of a dict of value arrays, in the shape Add expects
+    return(Reading(*[data[j][i] for j in Values]))
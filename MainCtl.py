@@ -1,23 +1,37 @@
 
+# startup is timed from here - see startup()
+import time as tm
+StartupStart = tm.perf_counter()
+
 print("Loading modules")
 # standard libraries
 import datetime as dt
-import time as tm
 import math
+import asyncio
 
 
-# installed libraries
-import bme280
-import smbus2
-
-# custom libraries
+# custom libraries - Almanac (and with it the Sun / Moon maths) is slow to import, so it is left until the display is up, see start_almanac
 import Config
-import Sun
-from Moon import MoonTime,Phase,JulianDay
 from Season import Season
-from Seg import disp, add_dot, dispupdate
+from Seg import init_display, text_page, led_page, show_page, update_pages, write_text, leds, dispupdate
 import TimeCalc
 import BST
+import Scheduler
+import Sensor
+import History
+
+# how long after starting each phase of startup finished, in seconds
+StartupTimes = {}
+
+# note the time a phase of startup finished - only the first time, as some of them (i.e. the almanac) are repeated later on
+def startup(phase):
+
+    if phase not in StartupTimes:
+        StartupTimes[phase] = tm.perf_counter() - StartupStart
+        print("Startup:", phase, "done at", round(StartupTimes[phase],3), "s")
+
+
+startup("imports")
 
 print("Initilising")
 # initialisation of loop
@@ -27,389 +41,338 @@ print("Initilising")
 LOCATION = Config.Location
 print(LOCATION)
 
-# get the i2c port
-i2c_port = int(Config.I2CPort)
-
-# get bme280 sensor address; address needs to be base16 integer but is stored as string
-bme280_address = int(str(Config.BME280),16)
+# bring up the displays - this is all that is done before the time is shown; the sensor and almanac are started by their tasks
+init_display()
 
-# get addresses of the HT16k33
-HT16K33 = Config.HT16K33
+startup("bus init")
 
-# initialise BME280 sensor
-bme280_bus = smbus2.SMBus(i2c_port)
-bme280_calibration_params = bme280.load_calibration_params(bme280_bus,bme280_address)
+# the almanac module, once the almanac task has started it
+Almanac = None
 
-# get time and store it to be used throughout the loop to prevent the rare potential where the date changes by the time the loop completes
-NOW = dt.datetime.now()
-
-#t_0 = 0
-#t_1 = 0
+# pick up the sensor history from before a restart
+History.Restore(now = tm.time())
 
 # Season Dict
 SeasonDict = {'Spring':0,'Summer':1,'Autumn':2,'Winter':3}
 
-# Moon phases - moon phase code will only give the 4 cardinal phases, however we want to display all 8
-Phases = {'New Moon':0, 'Waxing Crescent':1, 'First Quarter': 2, 'Waxing Gibbous':3, 'Full Moon': 4, 'Waning Gibbous':5,'Last Quarter':6,'Waning Crescent':7}
-# the in-between phases are discovered by comparing today's day with the day that the phases occur in the lunation. Where there is a change in sign (i.e. today < phase day becomes today > phase day (and today != phase day), we know the moon is between phases and therefore we move the phase on a half - that's what the Half_phase dict does. The key is the maximal phase, the value is the half phase before that cardinal phase)
-Half_phase = {'New Moon': 'Waning Crescent', 'First Quarter': 'Waxing Crescent', 'Full Moon': 'Waxing Gibbous','Last Quarter':'Waning Crescent'}
-
-first_run = 1
 c = 0 # this is needed for the display counter
- 
-# start a loop update everything
-while True:
-    
-    #t_0 = tm.time()
 
-    # wait for the clock to tick before running the main 
-    while dt.datetime.now().second == NOW.second:
-        tm.sleep(0.1)
-    #t_1 = tm.time()
-    #print("elapsed time: ",t_1 - t_0)
+# state shared between the tasks - the sensor task fills in bme280_data and the almanac task the sun / moon times; the display task shows
+# whatever is there, and leaves out anything that isn't ready yet
+bme280_data = None
 
-    # update time variable otherwise we'll be 1 second behind reality
-    NOW = dt.datetime.now()
-    
+sunrise = sunset = civil_start = civil_end = solar_day = night_length = solar_noon = moon_time_rise = moon_time_set = None
 
-    # only run the once per day - set up Sunrise / Set etc so that we are not hammering the processor for no good reason. Needs to run once though initially
-    if ((NOW.minute == 0) and (NOW.second == 0) and (NOW.hour == 0)) or (first_run == 1): # everything under here runs once per hour, or on the initial run
-        
-        #print(first_run)
-        first_run = 0 # reset the flag for the initial run
-            
-        # display season
+# the sun / moon and weather rotations, rendered as pages (see Seg.update_pages) when the values on them change - the display task then
+# only has to pick the page for the second. None until there is something to show
+SunPages = [None] * 8
+WeatherPages = [None] * 3
 
-        SeasonLight = SeasonDict[Season(NOW)]
-        SeasonBlanking = []
 
-        for i in range(0,8):
-            if SeasonLight != i:
-                SeasonBlanking.append(i)
+# the almanac file is only touched by one task at a time - Almanac.Update swaps the file over underneath Almanac.Day
+# made in main, as before Python 3.10 a Lock belongs to the event loop there is when it is made, which isn't the one asyncio.run makes
+almanac_lock = None
 
-        disp(99,9,0,[(SeasonLight,),tuple(SeasonBlanking)])
+# tomorrow's values, worked out ahead of time by prepare_tomorrow and swapped in by daily_update at midnight - (date, values) or None
+prepared = None
 
-        # get the sun times in a dict
-        sun = Sun.SunTimes(NOW.year,NOW.month,NOW.day,LOCATION[0],LOCATION[1])
+# when the last reading added to the sensor history was taken
+history_when = None
 
-        # set the sun times into various variables
-        sunrise = TimeCalc.Hrs(sun['Official'][0])
-        sunset = TimeCalc.Hrs(sun['Official'][1])
 
-        civil_start = TimeCalc.Hrs(sun['Civil'][0])
-        civil_end = TimeCalc.Hrs(sun['Civil'][1])
+# import the almanac and load the precomputed sun / moon data if there is any for this location - run in a worker thread with the
+# first day_values, so the time is already showing while it happens
+def start_almanac():
 
-        solar_day = TimeCalc.Hrs(sun['Official'][1] - sun['Official'][0])
-        
-        # tomorrow could be another month or year - so add a day within the datetime object
-        TOMORROW = NOW + dt.timedelta(days=+1)
-        
-        sun_tomorrow = Sun.SunTimes(TOMORROW.year,TOMORROW.month,TOMORROW.day,LOCATION[0],LOCATION[1])
+    global Almanac
 
-        night_length = TimeCalc.Hrs((sun_tomorrow['Official'][0] + 24) - sun['Official'][1])
+    if Almanac == None:
+        import Almanac
 
-        print(night_length)
+        Almanac.Load()
 
-        solar_noon = TimeCalc.Hrs((sun['Official'][1] + sun['Official'][0])/2)
 
-        moon_time_rise = MoonTime(NOW.year,NOW.month,NOW.day,LOCATION[0],-LOCATION[1],"Rise")
+# work out the sun / moon values shown for a day (a datetime.date) - slow if the day isn't in the almanac file, so it is run in a worker thread
+def day_values(DAY):
 
-        moon_time_set = MoonTime(NOW.year,NOW.month,NOW.day,LOCATION[0],-LOCATION[1],"Set")
+    start_almanac()
 
+    # get the sun / moon data - from the almanac file if it's there, otherwise it is calculated now (only the moon events that are shown)
+    almanac = Almanac.Day(DAY,("Rise","Set"))
 
-        # moonphase
-        moon_phases = Phase(NOW.year + (NOW.day / 365))
-    
-        #print(moon_phases)        
+    # get the sun times in a dict
+    sun = almanac['Sun']
 
-        # convert phases to JulianDays - this makes it easier to compare against the moon phase times
-        JD_moon_phase = []
-        for i in moon_phases:
-            moon_phases[i] = JulianDay(moon_phases[i][0],moon_phases[i][1],moon_phases[i][2])
-        
-        # order the phases as they could be in the wrong cronological order - remember, phases are cyclical    
-        ordered_phases = {k:v for k,v in sorted(moon_phases.items(), key = lambda item: item[1])}
+    # the night runs into tomorrow - which could be another month or year, so add a day within the date object. Only the sun is needed
+    sun_tomorrow = Almanac.Day(DAY + dt.timedelta(days=+1),())['Sun']
 
-        #print(ordered_phases)
-        
-        # convert today's date to Julian day
-        JD_today = JulianDay(NOW.year,NOW.month,NOW.day)
-        
-        #print(JD_today)
+    return({'sunrise':TimeCalc.Hrs(sun['Official'][0]),
+            'sunset':TimeCalc.Hrs(sun['Official'][1]),
+            'civil_start':TimeCalc.Hrs(sun['Civil'][0]),
+            'civil_end':TimeCalc.Hrs(sun['Civil'][1]),
+            'solar_day':TimeCalc.Hrs(sun['Official'][1] - sun['Official'][0]),
+            'night_length':TimeCalc.Hrs((sun_tomorrow['Official'][0] + 24) - sun['Official'][1]),
+            'solar_noon':TimeCalc.Hrs((sun['Official'][1] + sun['Official'][0])/2),
+            'moon_time_rise':almanac['Moon']['Rise'],
+            'moon_time_set':almanac['Moon']['Set'],
+            'phase':almanac['Phase']})
 
-        # iterate through each phase and compare it, they are in order, so where we get a change of logic (> then <, we have found the phase between the cardinal phases)
 
-        for i in ordered_phases:
-            #print(i)
-            if JD_today == ordered_phases[i]: # day is equal to a cardinal phase
-                phase = i
-            elif JD_today > ordered_phases[i]: # phase is in the future
-                pass
-            else: # phase is in the past; 
-                phase = Half_phase[i]
+# swap in a day's values - there is no await in here, so the display never sees half of one day and half of another
+def show_day(values):
 
-        #print(phase)     
+    global sunrise, sunset, civil_start, civil_end, solar_day, night_length, solar_noon, moon_time_rise, moon_time_set
 
+    # set the sun times into various variables
+    sunrise = values['sunrise']
+    sunset = values['sunset']
 
-        MoonLight = Phases[phase]
-        MoonBlanking = []
+    civil_start = values['civil_start']
+    civil_end = values['civil_end']
 
-        for i in range(0,8):
-            if MoonLight != i:
-                MoonBlanking.append(i)
+    solar_day = values['solar_day']
 
-        disp(99,12,0,[(MoonLight,),tuple(MoonBlanking)])
-            
+    night_length = values['night_length']
 
-        #if JD_today == 
+    print(night_length)
 
-        #print(moon_time_rise)
+    solar_noon = values['solar_noon']
 
-    #######################################
-    ## everything below runs every second
-    
-    # get sensor data
-    bme280_data = bme280.sample(bme280_bus,bme280_address,bme280_calibration_params)
-    #print("Temp: ",round(bme280_data.temperature,1), "deg Humidity: ", round(bme280_data.humidity,0), "% Pressure: ",round(bme280_data.pressure,0))
+    moon_time_rise = values['moon_time_rise']
 
-    #print(NOW.strftime('%H:%M:%S %a %d-%m-%y'))
-    
-
-    # to display it, they need to be in a zero-padded list so that the digits can be iterated over
+    moon_time_set = values['moon_time_set']
 
-    temperature = bme280_data.temperature
-    humidity = bme280_data.humidity
+    update_pages(SunPages,[civil_start,civil_end,sunrise,sunset,moon_time_rise,moon_time_set,solar_day,night_length],sun_page)
 
-    bme_t = [int(x) for x in f"{int(math.trunc(temperature)):02d}"]
-    #print(temperature)
-    # get decimals
-    temperature_decimals = math.trunc((temperature - math.trunc(temperature))*100)
-    #print(temperature_decimals)
-    bme_tdec = [int(x) for x in f"{int(temperature_decimals):02d}"]
+    startup("first almanac")
 
-    #print(bme_tdec)
+    # moonphase - index of the LED for the phase
+    MoonLight = values['phase']
 
-    bme_h = [int(x) for x in f"{int(math.trunc(humidity)):02d}"]
+    leds(12,0,1 << MoonLight)
 
-    humidity_decimals = math.trunc((humidity - math.trunc(humidity))*100)
-    bme_hdec = [int(x) for x in f"{int(humidity_decimals):02d}"]
 
-    
-    bme_p = [int(x) for x in f"{int(round(bme280_data.pressure,0)):04d}"]
-    #print(bme_p)
+# an hour before midnight, work out tomorrow's values in a worker thread so that midnight is just a swap
+async def prepare_tomorrow(NOW):
 
+    global prepared
 
-    hr = [int(x) for x in f"{NOW.hour:02d}"]
-    mn = [int(x) for x in f"{NOW.minute:02d}"]
-    sc = [int(x) for x in f"{NOW.second:02d}"]
+    loop = asyncio.get_running_loop()
 
-    dy = [int(x) for x in f"{NOW.day:02d}"]
-    mt = [int(x) for x in f"{NOW.month:02d}"]
-    
-    yr = [int(x) for x in f"{NOW.year:02d}"]
+    TOMORROW = NOW.date() + dt.timedelta(days=+1)
 
-    sunrise_hr = [int(x) for x in f"{sunrise[0]:02d}"]
-    sunrise_mn = [int(x) for x in f"{sunrise[1]:02d}"]
+    try:
+        async with almanac_lock:
+            values = await loop.run_in_executor(None,day_values,TOMORROW)
+    except Exception as e:
+        # daily_update will have another go at midnight
+        print("Couldn't work out the almanac for", TOMORROW, "-", e)
+        return
 
-    sunset_hr =  [int(x) for x in f"{sunset[0]:02d}"]
-    sunset_mn =  [int(x) for x in f"{sunset[1]:02d}"]
+    prepared = (TOMORROW,values)
 
-    civil_start_hr = [int(x) for x in f"{civil_start[0]:02d}"]
-    civil_start_mn = [int(x) for x in f"{civil_start[1]:02d}"]
 
-    civil_end_hr =  [int(x) for x in f"{civil_end[0]:02d}"]
-    civil_end_mn = [int(x) for x in f"{civil_end[1]:02d}"]
+# only run the once per day - set up Sunrise / Set etc so that we are not hammering the processor for no good reason. Needs to run once though initially
+# normally tomorrow's values are ready by midnight; if not (i.e. just started) they are worked out in another thread so that the display carries on ticking
+async def daily_update(NOW):
 
-    solar_noon_hr = [int(x) for x in f"{solar_noon[0]:02d}"]
-    solar_noon_mn = [int(x) for x in f"{solar_noon[1]:02d}"]
+    global prepared
 
-    #print(solar_noon_mn)
+    loop = asyncio.get_running_loop()
 
-    solar_day_hr = [int(x) for x in f"{solar_day[0]:02d}"]
-    solar_day_mn = [int(x) for x in f"{solar_day[1]:02d}"]
+    # display season
 
-    night_hr = [int(x) for x in f"{night_length[0]:02d}"]
-    night_mn = [int(x) for x in f"{night_length[1]:02d}"]
+    SeasonLight = SeasonDict[Season(NOW)]
 
-    # moon times - these may not happen in the day, so check and correct for it
+    leds(9,0,1 << SeasonLight)
 
-    if moon_time_rise == False:
-        moon_rise_hr = [23,23]
-        moon_rise_mn = [23,23]
+    if (prepared != None) and (prepared[0] == NOW.date()):
+        values = prepared[1]
     else:
-        moon_rise_hr = [int(x) for x in f"{moon_time_rise[0]:02d}"]
-        moon_rise_mn = [int(x) for x in f"{moon_time_rise[1]:02d}"]
+        try:
+            async with almanac_lock:
+                values = await loop.run_in_executor(None,day_values,NOW.date())
+        except Exception as e:
+            # carry on showing the last day's times rather than nothing
+            print("Couldn't work out the almanac for", NOW.date(), "- keeping the last one -", e)
+            values = None
 
-    if moon_time_set == False:
-        moon_set_hr = [23,23]
-        moon_set_mn = [23,23]
-    else:
-        moon_set_hr = [int(x) for x in f"{moon_time_set[0]:02d}"]
-        moon_set_mn = [int(x) for x in f"{moon_time_set[1]:02d}"]
+    prepared = None
 
-    # update status LEDs
+    if values != None:
+        show_day(values)
 
-    # day of week
-    DoW = NOW.weekday()
-    DoWBlanking = []
-    
+    # top up the almanac file a few days at a time so it stays ahead of today
+    try:
+        async with almanac_lock:
+            await loop.run_in_executor(None,Almanac.Update,NOW.date())
+    except Exception as e:
+        print("Couldn't update the almanac file -", e)
 
-    #create blanking list
-    for i in range(0,8):
-        if DoW != i:
-            DoWBlanking.append(i)
 
-    #print(tuple(DoWBlanking))
+# hours and minutes as HH.MM for write_text - moon times may not happen in the day, which is shown as --.--
+def hhmm(t):
 
-    disp(99,8,0,[(DoW,),tuple(DoWBlanking)])
-    #disp(99,8,0,[(0,),(1,2,3,4,5,6,7)])
+    if t == False:
+        return("--.--")
 
-    # GMT / BST
-    disp(99,11,0,[(0,),(1,)])
-    
+    return(f"{t[0]:02d}.{t[1]:02d}")
+
+
+# a page of the sun / moon rotation - the time on banks 0-3, and the i'th LED on bank 10 to say which it is
+# in order: dawn, dusk, sunrise, sunset, moonrise, moonset, day length, night length
+def sun_page(i,t):
 
-    # display loop
-    for i in [1,0]:
+    return(text_page(0,hhmm(t)) + led_page(10,1 << i))
 
-        # Sunrise/Set - rotate information on display; display for secs each
 
+# a page of the weather rotation - temperature, humidity or pressure on banks 4-7, so a reading that is too long can't run on to the LEDs in
+# bank 8, with its LED on bank 11 (the first 2 LEDs on that bank are for GMT / BST)
+def weather_page(i,text):
 
-        # Sun and Moon cycle
+    return(text_page(4,text,4) + led_page(11,1 << (i + 2),0b11111100))
 
-        # use a counter as 16 displays doesn't nicely fit into 60 seconds, but does in 240, and 6 fits nicely in 240 too.
-        #print("c mod 16:",c % 16,"c:",c)
 
-        if c % 16 == 0:         
-            # Dawn --
+# render a sensor reading on to the weather pages - temperature and humidity are truncated rather than rounded to 2 decimals
+def show_weather(reading):
 
-            # leds
-            disp(99,10,0,[(0,),(1,2,3,4,5,6,7)])
+    update_pages(WeatherPages,["%05.2f" % (math.trunc(reading.temperature * 100) / 100),
+                               "%05.2f" % (math.trunc(reading.humidity * 100) / 100),
+                               "%04d" % round(reading.pressure)],weather_page)
 
-            disp(civil_start_hr[i], 0+i,0)
-            disp(civil_start_mn[i], 2+i,0)
 
+# everything below runs every second - NOW is the time of the second being shown, so the date can't change part way through
+def second_update(NOW):
 
-        elif c % 16 == 2:
-            # -- Dusk
+    global c
 
-            # leds
-            disp(99,10,0,[(1,),(0,2,3,4,5,6,7)])
+    # sensor data is read by sensor_update
+    #print("Temp: ",round(bme280_data.temperature,1), "deg Humidity: ", round(bme280_data.humidity,0), "% Pressure: ",round(bme280_data.pressure,0))
+
+    #print(NOW.strftime('%H:%M:%S %a %d-%m-%y'))
+    
+
+    # update status LEDs
 
-            disp(civil_end_hr[i], 0+i,0)
-            disp(civil_end_mn[i], 2+i,0)
+    # day of week
+    DoW = NOW.weekday()
 
+    leds(8,0,1 << DoW)
 
-        elif c % 16 == 4:
-            # -- Sunrise
-            # leds
-            disp(99,10,0,[(2,),(0,1,3,4,5,6,7)])
-          
-            disp(sunrise_hr[i], 0+i,0)
-            disp(sunrise_mn[i], 2+i,0)
+    # GMT / BST
+    leds(11,0,1 << 0,0b11)
+    
 
+    # Sunrise/Set - rotate information on display; display for secs each
 
-        elif c % 16 == 6:
-            # Sunset --
 
-            # leds
-            disp(99,10,0,[(3,),(0,1,2,4,5,6,7)])
+    # Sun and Moon cycle, then temperature, humidity and pressure cycle - each page is shown for 2 seconds
 
-            disp(sunset_hr[i], 0+i,0)
-            disp(sunset_mn[i], 2+i,0)
+    # use a counter as 16 displays doesn't nicely fit into 60 seconds, but does in 240, and 6 fits nicely in 240 too.
+    #print("c mod 16:",c % 16,"c:",c)
 
+    # left out until the almanac is ready / the sensor has been read
+    if (c % 2 == 0) and (SunPages[0] != None):
+        show_page(0,SunPages[(c % 16) // 2][1])
 
-        elif c % 16 == 8:
-            # moonrise
+    if (c % 2 == 0) and (WeatherPages[0] != None):
+        show_page(0,WeatherPages[(c % 6) // 2][1])
+        
     
-            # leds
-            disp(99,10,0,[(4,),(0,1,2,3,5,6,7)])
+    # Time - with blinking dots
+    if c % 2 == 0:
+        dot = "."
+    else:
+        dot = ""
 
-            #placeholder
-            disp(moon_rise_hr[i],0+i,0)
-            disp(moon_rise_mn[i],2+i,0)
+    write_text(1,0,f"{NOW.hour:02d}{dot}{NOW.minute:02d}{dot}{NOW.second:02d}{dot}")
 
-        elif c % 16 == 10:
-            # moonset
+    # Date
+    write_text(1,8,f"{NOW.day:02d}.{NOW.month:02d}.{NOW.year % 100:02d}")
 
-            # leds
-            disp(99,10,0,[(5,),(0,1,2,3,4,6,7)])
+    # add one to the counter, and re-cycle at 240.
+    c += 1
+    c %= 240 
 
-            #placeholder
-            disp(moon_set_hr[i],0+i,0)
-            disp(moon_set_mn[i],2+i,0)
-        
-        elif c % 16 == 12:
-            # - Day length -
-            # leds
-            disp(99,10,0,[(6,),(0,1,2,3,4,5,7)])
+    # update display once all the buffers are filled
 
-            disp(solar_day_hr[i],0+i,0)
-            disp(solar_day_mn[i],2+i,0)
+    dispupdate(1)
+    dispupdate(0)
 
-        elif c % 16 == 14:
-            #night length
-            # leds
-            disp(99,10,0,[(7,),(0,1,2,3,4,5,6)])
 
-            disp(night_hr[i],0+i,0)
-            disp(night_mn[i],2+i,0)
+# read the sensor in its own task - the read is done in another thread so a slow I2C transfer can't hold up the display. The sensor is
+# only read when its last reading goes stale (see Sensor.py), so this sleeps until then
+async def sensor_update():
 
-       
-        
+    global bme280_data
 
-        # temperature, humidity and pressure cycle
-        if c % 6 == 0:
-            disp(bme_t[i], 4+i,0)
-            #print(bme_tdec[i])
-            add_dot(5,0)
-            disp(bme_tdec[i],6+i,0)
+    loop = asyncio.get_running_loop()
 
-            disp(99,11,0,[(2,),(3,4,5,6,7)])
+    # initialise BME280 sensor - loads its calibration over i2c. If that fails it is tried again by each read
+    try:
+        await loop.run_in_executor(None,Sensor.Open)
 
-        elif c % 6 == 2:           
-            disp(bme_h[i], 4+i,0)
-            add_dot(5,0)
-            disp(bme_hdec[i],6+i,0)
+        startup("calibration load")
+    except Exception as e:
+        print("Couldn't open the BME280 -", e)
 
-            disp(99,11,0,[(3,),(2,4,5,6,7)])
+    while True:
+        # a failed read (i.e. an i2c error) leaves the last reading showing and is tried again after Config.SensorRetry seconds
+        try:
+            bme280_data = await loop.run_in_executor(None,Sensor.Read)
+        except Exception as e:
+            print("Couldn't read the BME280 -", e)
 
-        elif c % 6 == 4:
+            await asyncio.sleep(Config.SensorRetry)
+            continue
 
-            disp(bme_p[i],4+i,0)
-            disp(bme_p[i+2],6+i,0)
-            disp(99,11,0,[(4,),(2,3,5,6,7)])     
-            
-        
-        # add blinking dots to time
-        if c % 2 == 0:
-            add_dot(1,1)
-            add_dot(3,1)
-            add_dot(5,1)            
+        show_weather(bme280_data)
 
+        await asyncio.sleep(Sensor.Wait())
 
-        # Time5
-        disp(hr[i], 0+i,1)
-        disp(mn[i], 2+i,1)
-        disp(sc[i], 4+i,1)
 
-        # Date
-        disp(dy[i], 8+i,1)
-        disp(mt[i], 10+i,1)
-        disp(yr[i+2], 12+i,1)
+# once a minute, add the latest sensor reading to the history - and every Config.HistorySnapshot minutes save the history, in another thread
+# a reading is only added once, so if the sensor stops giving new ones the history doesn't fill up with the last one
+async def history_update(NOW):
 
-    # add one to the counter, and re-cycle at 240.
-    c += 1
-    c %= 240 
+    global history_when
 
-    # add dots to date, and cycle times
-    add_dot(9,1)
-    add_dot(11,1)
-    add_dot(1,0)
-    
-    # update display once all the buffers are filled
+    if (Sensor.Last != None) and (Sensor.LastWhen != history_when):
+        History.Add(Sensor.Last,Sensor.LastWhen)
+
+        history_when = Sensor.LastWhen
+
+    if (NOW.hour * 60 + NOW.minute) % Config.HistorySnapshot == 0:
+        data = History.Pack()
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None,History.Write,data)
+        except OSError as e:
+            print("Couldn't save the sensor history -", e)
+
+
+async def main():
+    global almanac_lock
+
+    almanac_lock = asyncio.Lock()
+
+    # show the time straight away rather than waiting for the first tick
+    second_update(dt.datetime.now().replace(microsecond = 0))
+
+    startup("first frame")
+
+    # the sensor runs as its own task, the almanac and display are run by the scheduler - if either stops with an error, so does the clock
+    await asyncio.gather(sensor_update(),Scheduler.RunAsync())
 
-    dispupdate(1)
-    dispupdate(0)
 
+if __name__ == "__main__":
 
+    # the daily update runs at midnight, and on the first tick so there is something to show; tomorrow's values are worked out an hour before
+    # midnight (or on the first tick if it's later than that); the display is updated on every tick
+    Scheduler.Daily(daily_update)
+    Scheduler.Daily(prepare_tomorrow,23,Startup = False)
+    Scheduler.EverySecond(second_update)
+    Scheduler.EveryMinute(history_update)
 
+    # start ticking
+    asyncio.run(main())
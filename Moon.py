@@ -8,9 +8,37 @@
 # The method of calculation is based on those by Jean Meeus in Astronomical Algorithms and relevant chapters / equation locations are noted
 #
 # Moon Rise, Set or Transit can be obtained by calling MoonTime(YEAR,MONTH,DAY,Latitude,Longitude,Event) where event is either "Rise","Set" or "Transit" and Lat / Lon is decimal degrees
+#
+# MoonTimes(YEAR,MONTH,DAY,Latitude,Longitude) gives Rise, Set and Transit together from the one set of iterations (Events = ("Rise","Set")
+# for just some of them)
+# For a run of days, MoonTimesRange(start,end,Latitude,Longitude) gives Rise, Set and Transit for each day in one go
+#
+# The Moon's positions are kept in a memo, and can be interpolated rather than worked out for each estimate - see PositionMode
+#
+# PhaseOfDay(YEAR,MONTH,DAY) gives the phase of the moon on a day and PhaseAt(JD) the phase and fraction lit at any time - from the phase
+# tracker, which works out the times of the phases once and keeps them
 
 
 import math
+import array
+import bisect
+import collections
+import datetime as dt
+
+# NumPy is optional - if it is installed, the periodic term sums for a vector of epochs (i.e. RAandDec for an array of T) are evaluated as
+# matrix products, otherwise they are summed one epoch at a time in pure Python. A single epoch is always summed in pure Python, as for
+# one value NumPy's overheads cost more than it saves.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# set to False to force the pure Python sums even when NumPy is available
+UseNumPy = np is not None
+
+def Vector(x):
+    # True if x is a vector of epochs (a list, tuple or array) rather than a single value
+    return(not isinstance(x,(int,float)))
 
 def DegtoHMS(angle):
     HR = math.floor(angle / 15)
@@ -116,23 +144,20 @@ def Theta0(YEAR,MONTH,DAY):
     
     return(THETA0)
     
-def lrbMatrixSum(matrix,ecc,coeff,trig,D,M,Mdash,F):
+def lrbMatrixSum(table,ecc,trig,D,M,Mdash,F):
     # used for summing up the terms involving l, r or b;
-    # matrix is the list of coefficients and arguments
+    # table is the compiled table of arguments and coefficients (see CompilelrbTable)
     # ecc is E - the eccentricity of the earths orbit (47.6 in Meeus)
-    # coeff is the position of the coefficient for l, r or b, in the matrix (it'll be either 4 or 5 depending on which matrix is used)
     # trig is the function to perform - sin or cos
     # D, M, Mdash and F should be self explanitory and be previously calculated
     
-    # positions in the matrix where D, M, Mdash and F can all be found
-    Dpos = 0
-    Mpos = 1
-    Mdashpos = 2
-    Fpos = 3
-    
-        # set up variable for summation
+    # set up variable for summation
     s = 0
     
+    # a vector of epochs (i.e. ecc, D, M, Mdash and F are arrays) goes to NumPy, or without it is summed one epoch at a time
+    if Vector(D) and not UseNumPy:
+        return([lrbMatrixSum(table,e,trig,d,m,mdash,f) for e,d,m,mdash,f in zip(ecc,D,M,Mdash,F)])
+    
     # set up a generic function reference so that all sums can be calculated efficiently without mostly duplicating a def function
     if trig == "cos":
         trig = math.cos
@@ -141,41 +166,39 @@ def lrbMatrixSum(matrix,ecc,coeff,trig,D,M,Mdash,F):
     else:
         raise SystemExit('lrbMatrixSum requires trig argument to be either "cos" or "sin"') 
     
-    # iterate through whole matrix adding up all the arguments and coefficients
-    for row in matrix:
-        #print(matrix[i])
-        #print(row[Mpos])
-        
-        # as note above 47.6 in Meeus - if coeff of M is 1 or -1 then multiply coeff by E; if coeff of M is 2 or -2 then multiply coeff by (E*E)
-        if abs(row[Mpos]) == 1:
-            E = ecc
-        elif abs(row[Mpos]) == 2:
-            E = ecc * ecc
-        else:
-            E = 1
-        #print(E)
-        
-        s += row[coeff] * E * trig(math.radians((D * row[Dpos]) + (M * row[Mpos]) + (Mdash * row[Mdashpos]) + (F * row[Fpos]))) 
+    if Vector(D):
+        return(lrbMatrixSumNumPy(table,ecc,trig,D,M,Mdash,F))
+    
+    # as note above 47.6 in Meeus - if coeff of M is 1 or -1 then multiply coeff by E; if coeff of M is 2 or -2 then multiply coeff by (E*E)
+    # the table holds the power of E for each row so it only needs looking up here
+    Epower = (1, ecc, ecc * ecc)
+    
+    # convert the arguments to radians once rather than for every row
+    D = math.radians(D)
+    M = math.radians(M)
+    Mdash = math.radians(Mdash)
+    F = math.radians(F)
+    
+    # single pass through the columns of the table adding up all the arguments and coefficients
+    for d,m,mdash,f,c,e in zip(*table):
+        s += c * Epower[e] * trig((D * d) + (M * m) + (Mdash * mdash) + (F * f))
     
     #print(s)
     return(s)
 
-def psiepsilonMatrixSum(matrix,coeff,trig,D,M,Mdash,F,Ohmega):
+def psiepsilonMatrixSum(table,trig,T,D,M,Mdash,F,Ohmega):
     # used for summing up the terms involving delta-psi and delta-epsilon for;
-    # matrix is the list of coefficients and arguments
-    # coeff is the position of the coefficient for delta-psi or delta-epsilon, in the matrix (it'll be either 5 or 6 depending on which matrix is used)
+    # table is the compiled table of arguments and coefficients (see CompileTable) - each coefficient is of the form c + (cT * T)
     # trig is the function to perform - sin or cos
-    # D, M, Mdash, F and Ohmega should be self explanitory and be previously calculated
-    
-    # positions in the matrix where D, M, Mdash and F can all be found
-    Dpos = 0
-    Mpos = 1
-    Mdashpos = 2
-    Fpos = 3
-    Ohmegapos = 4
+    # T, D, M, Mdash, F and Ohmega should be self explanitory and be previously calculated
     
-    # set up variable for sumation
+    # set up variables for sumation - s for the constant part of the coefficients and sT for the part multiplied by T
     s = 0
+    sT = 0
+    
+    # a vector of epochs (i.e. T, D, M, Mdash, F and Ohmega are arrays) goes to NumPy, or without it is summed one epoch at a time
+    if Vector(D) and not UseNumPy:
+        return([psiepsilonMatrixSum(table,trig,t,d,m,mdash,f,o) for t,d,m,mdash,f,o in zip(T,D,M,Mdash,F,Ohmega)])
     
     # set up a reference to the trig function to make function work for both delta-psi and delta-epsilon
     if trig == "cos":
@@ -183,33 +206,394 @@ def psiepsilonMatrixSum(matrix,coeff,trig,D,M,Mdash,F,Ohmega):
     elif trig == "sin":
         trig = math.sin
     else:
-        raise SystemExit('lrbMatrixSum requires trig argument to be either "cos" or "sin"')
-    
-    # iterate through matrix adding all ters together
-    for row in matrix:
-        s += row[coeff] * trig(math.radians((D * row[Dpos]) + (M * row[Mpos]) + (Mdash * row[Mdashpos]) + (F * row[Fpos]) + (Ohmega * row[Ohmegapos])))
-        
-    return(s)
+        raise SystemExit('psiepsilonMatrixSum requires trig argument to be either "cos" or "sin"')
+    
+    if Vector(D):
+        return(psiepsilonMatrixSumNumPy(table,trig,T,D,M,Mdash,F,Ohmega))
+    
+    # convert the arguments to radians once rather than for every row
+    D = math.radians(D)
+    M = math.radians(M)
+    Mdash = math.radians(Mdash)
+    F = math.radians(F)
+    Ohmega = math.radians(Ohmega)
+    
+    # single pass through the columns of the table adding all terms together
+    for d,m,mdash,f,o,c,cT in zip(*table):
+        x = trig((D * d) + (M * m) + (Mdash * mdash) + (F * f) + (Ohmega * o))
+        s += c * x
+        sT += cT * x
+    
+    # apply the T dependent part of the coefficients in one go
+    return(s + (sT * T))
 
-def PhaseCorrectionMatrixSum(matrix,M,Mdash,F,Ohmega):
+def PhaseCorrectionMatrixSum(table,E,M,Mdash,F,Ohmega):
     # calculate the sum of the corrections for Moon Phase
-    Mpos = 0
-    Mdashpos = 1
-    Fpos = 2
-    Ohmpos = 3
-        
+    # table is the compiled table of arguments, coefficients and powers of E (see CompilePhaseTable)
+    # E, M, Mdash, F and Ohmega are lists in the form [new moon, full moon, first quarter, last quarter] - or with NumPy, arrays of shape
+    # (4, number of epochs) for a vector of epochs
+    
+    if UseNumPy and (np.ndim(M) > 1):
+        return(PhaseCorrectionMatrixSumNumPy(table,E,M,Mdash,F,Ohmega))
+    
     # create list for the calculation in form [new moon, full moon, quarters]
     s = [0,0,0,0]
     
     #print("a:",a)
       
     for i in range(len(s)):
-        for row in matrix:
+        # E raised to the power 0, 1 or 2 - indexed by the power of E column for this phase
+        Epower = (1, E[i], E[i] * E[i])
+        
+        for m,mdash,f,o,c,e in zip(table[0],table[1],table[2],table[3],table[4 + i],table[8 + i]):
             # sin(combination of M, Mdash, F and Ohmega) * moon phase coefficient 
-            s[i] += math.sin(math.radians((M[i] * row[Mpos]) + (Mdash[i] * row[Mdashpos]) + (F[i] * row[Fpos]) + (Ohmega[i] * row[Ohmpos]))) * row[i+4]
+            s[i] += math.sin(math.radians((M[i] * m) + (Mdash[i] * mdash) + (F[i] * f) + (Ohmega[i] * o))) * c * Epower[e]
 
     return(s)
+
+# NumPy versions of the sums above, used for vectors of epochs. Each series is evaluated as one matrix product of the arguments followed by
+# one trig call. D, M, Mdash, F (and so on) can either be single values or arrays of values - one per epoch - in which case an array of
+# sums is returned.
+
+# NumPy arrays of the compiled tables, built the first time a table is used and kept against the table they came from
+NumPyTables = {}
+
+def NumPyTable(table,args):
+    # returns (matrix of arguments with one row per term, followed by each of the remaining columns as an array)
+    key = id(table)
+    
+    if key not in NumPyTables:
+        NumPyTables[key] = (table,(np.array(table[:args],dtype=float).T,) + tuple(np.array(i) for i in table[args:]))
         
+    return(NumPyTables[key][1])
+
+def NumPyTrig(trig):
+    # NumPy equivalent of the math trig function
+    if trig is math.cos:
+        return(np.cos)
+    
+    return(np.sin)
+
+def lrbMatrixSumNumPy(table,ecc,trig,D,M,Mdash,F):
+    # as lrbMatrixSum
+    Args,Coeff,Epower = NumPyTable(table,4)
+    
+    # arguments as columns of a matrix - one column per epoch
+    x = np.radians(np.array(np.broadcast_arrays(D,M,Mdash,F),dtype=float).reshape(4,-1))
+    
+    # powers of E for each epoch, then pick out the power needed by each row
+    ecc = np.broadcast_to(np.asarray(ecc,dtype=float).reshape(-1),x.shape[1:])
+    Eweight = np.stack((np.ones_like(ecc),ecc,ecc * ecc))[Epower]
+    
+    s = (Coeff[:,None] * Eweight * NumPyTrig(trig)(Args @ x)).sum(axis=0)
+    
+    if np.ndim(D) == 0:
+        return(float(s[0]))
+    
+    return(s)
+
+def psiepsilonMatrixSumNumPy(table,trig,T,D,M,Mdash,F,Ohmega):
+    # as psiepsilonMatrixSum
+    Args,Coeff,CoeffT = NumPyTable(table,5)
+    
+    # arguments as columns of a matrix - one column per epoch
+    x = np.radians(np.array(np.broadcast_arrays(D,M,Mdash,F,Ohmega),dtype=float).reshape(5,-1))
+    
+    t = NumPyTrig(trig)(Args @ x)
+    
+    s = (Coeff @ t) + (np.asarray(T,dtype=float).reshape(-1) * (CoeffT @ t))
+    
+    if np.ndim(D) == 0:
+        return(float(s[0]))
+    
+    return(s)
+
+def PhaseCorrectionMatrixSumNumPy(table,E,M,Mdash,F,Ohmega):
+    # as PhaseCorrectionMatrixSum - E, M, Mdash, F and Ohmega can also be arrays of shape (4, number of epochs)
+    columns = NumPyTable(table,4)
+    Args = columns[0]
+    Coeff = np.stack(columns[1:5],axis=1)
+    Epower = np.stack(columns[5:9],axis=1)
+    
+    # arguments in the form [argument, phase, epoch]
+    x = np.radians(np.array(np.broadcast_arrays(M,Mdash,F,Ohmega),dtype=float).reshape(4,4,-1))
+    
+    # powers of E for each phase and epoch, then pick out the power needed by each row
+    E = np.broadcast_to(np.asarray(E,dtype=float).reshape(4,-1),x.shape[1:])
+    Eweight = np.stack((np.ones_like(E),E,E * E))[Epower,np.arange(4)]
+    
+    s = (np.sin(np.einsum('ra,ape->rpe',Args,x)) * Coeff[:,:,None] * Eweight).sum(axis=0)
+    
+    if np.ndim(M) == 1:
+        return(list(s[:,0]))
+    
+    return(s)
+        
+
+# Periodic terms for the position of the Moon (Meeus ch 47), nutation (Meeus ch 22) and Moon Phase (Meeus ch 49)
+#
+# These never change, so they are set up once when the module is loaded rather than being rebuilt every time RAandDec, EpsilonPsi or Phase is called.
+# The tables below are laid out as in Meeus for ease of checking; the sums use the compiled versions further down which
+# are held as columns (one tuple per column) with any rows that have a zero coefficient dropped.
+
+# matrix of coefficients and arguments for Sum l and Sum r (Table 47.A)
+# l and r matrix is as follows:
+# form is [D,M,Mdash,F, Sum l coefficient, Sum r coefficient]
+landrMatrix = ( \
+    (0,0,1,0,6288774,-20905355),
+    (2,0,-1,0,1274027,-3699111),
+    (2,0,0,0,658314,-2955968),
+    (0,0,2,0,213618,-569925),
+    (0,1,0,0,-185116,48888),
+    (0,0,0,2,-114332,-3149),
+    (2,0,-2,0,58793,246158),
+    (2,-1,-1,0,57066,-152138),
+    (2,0,1,0,53322,-170733),
+    (2,-1,0,0,45758,-204586),
+    (0,1,-1,0,-40923,-129620),
+    (1,0,0,0,-34720,108743),
+    (0,1,1,0,-30383,104755),
+    (2,0,0,-2,15327,10321),
+    (0,0,1,2,-12528,0),
+    (0,0,1,-2,10980,79661),
+    (4,0,-1,0,10675,-34782),
+    (0,0,3,0,10034,-23210),
+    (4,0,-2,0,8548,-21636),
+    (2,1,-1,0,-7888,24208),
+    (2,1,0,0,-6766,30824),
+    (1,0,-1,0,-5163,-8379),
+    (1,1,0,0,4987,-16675),
+    (2,-1,1,0,4036,-12831),
+    (2,0,2,0,3994,-10445),
+    (4,0,0,0,3861,-11650),
+    (2,0,-3,0,3665,14403),
+    (0,1,-2,0,-2689,-7003),
+    (2,0,-1,2,-2602,0),
+    (2,-1,-2,0,2390,10056),
+    (1,0,1,0,-2348,6322),
+    (2,-2,0,0,2236,-9884),
+    (0,1,2,0,-2120,5751),
+    (0,2,0,0,-2069,0),
+    (2,-2,-1,0,2048,-4950),
+    (2,0,1,-2,-1773,4130),
+    (2,0,0,2,-1595,0),
+    (4,-1,-1,0,1215,-3958),
+    (0,0,2,2,-1110,0),
+    (3,0,-1,0,-892,3258),
+    (2,1,1,0,-810,2616),
+    (4,-1,-2,0,759,-1897),
+    (0,2,-1,0,-713,-2117),
+    (2,2,-1,0,-700,2354),
+    (2,1,-2,0,691,0),
+    (2,-1,0,-2,596,0),
+    (4,0,1,0,549,-1423),
+    (0,0,4,0,537,-1117),
+    (4,-1,0,0,520,-1571),
+    (1,0,-2,0,-487,-1739),
+    (2,1,0,-2,-399,0),
+    (0,0,2,-2,-381,-4421),
+    (1,1,1,0,351,0),
+    (3,0,-2,0,-340,0),
+    (4,0,-3,0,330,0),
+    (2,-1,2,0,327,0),
+    (0,2,1,0,-323,1165),
+    (1,1,-1,0,299,0),
+    (2,0,3,0,294,0),
+    (2,0,-1,-2,0,8752),
+    )
+
+# matrix of coefficients and arguments for Sum b (Table 47.B)
+# b matrix is as follows:
+# form is [D,M,Mdash,F, Sum b coefficient]
+bMatrix = ( \
+    (0,0,0,1,5128122),
+    (0,0,1,1,280602),
+    (0,0,1,-1,277693),
+    (2,0,0,-1,173237),
+    (2,0,-1,1,55413),
+    (2,0,-1,-1,46271),
+    (2,0,0,1,32573),
+    (0,0,2,1,17198),
+    (2,0,1,-1,9266),
+    (0,0,2,-1,8822),
+    (2,-1,0,-1,8216),
+    (2,0,-2,-1,4324),
+    (2,0,1,1,4200),
+    (2,1,0,-1,-3359),
+    (2,-1,-1,1,2463),
+    (2,-1,0,1,2211),
+    (2,-1,-1,-1,2065),
+    (0,1,-1,-1,-1870),
+    (4,0,-1,-1,1828),
+    (0,1,0,1,-1794),
+    (0,0,0,3,-1749),
+    (0,1,-1,1,-1565),
+    (1,0,0,1,-1491),
+    (0,1,1,1,-1475),
+    (0,1,1,-1,-1410),
+    (0,1,0,-1,-1344),
+    (1,0,0,-1,-1335),
+    (0,0,3,1,1107),
+    (4,0,0,-1,1021),
+    (4,0,-1,1,833),
+    (0,0,1,-3,777),
+    (4,0,-2,1,671),
+    (2,0,0,-3,607),
+    (2,0,2,-1,596),
+    (2,-1,1,-1,491),
+    (2,0,-2,1,-451),
+    (0,0,3,-1,439),
+    (2,0,2,1,422),
+    (2,0,-3,-1,421),
+    (2,1,-1,1,-366),
+    (2,1,0,1,-351),
+    (4,0,0,1,331),
+    (2,-1,1,1,315),
+    (2,-2,0,-1,302),
+    (0,0,1,3,-283),
+    (2,1,1,-1,-229),
+    (1,1,0,-1,223),
+    (1,1,0,1,223),
+    (0,1,-2,-1,-220),
+    (2,1,-1,-1,-220),
+    (1,0,1,1,-185),
+    (2,-1,-2,-1,181),
+    (0,1,2,1,-177),
+    (4,0,-2,-1,176),
+    (4,-1,-1,-1,166),
+    (1,0,1,-1,-164),
+    (4,0,1,-1,132),
+    (1,0,-1,-1,-119),
+    (4,-1,0,-1,115),
+    (2,-2,0,1,107),
+    )
+
+# matrix of arguments of D, M, Mdash, F and Ohmega and coefficients of delta-psi and delta-epsilon (Table 22.A)
+# the coefficients are of the form c + (cT * T) - the cT part is held in its own column so that T can be applied at the end of the sum
+# [ [D, M, Mdash, F, Ohmega, Delta-psi, Delta-psi T, Delta-epsilon, Delta-epsilon T] ]
+psiepsilonMatrix = ( \
+    (0,0,0,0,1,-171996,-174.2,92025,8.9),
+    (-2,0,0,2,2,-13187,-1.6,5736,-3.1),
+    (0,0,0,2,2,-2274,-0.2,977,-0.5),
+    (0,0,0,0,2,2062,0.2,-895,0.5),
+    (0,1,0,0,0,1426,-3.4,54,-0.1),
+    (0,0,1,0,0,712,0.1,-7,0),
+    (-2,1,0,2,2,-517,1.2,224,-0.6),
+    (0,0,0,2,1,-386,-0.4,200,0),
+    (0,0,1,2,2,-301,0,129,-0.1),
+    (-2,-1,0,2,2,217,-0.5,-95,0.3),
+    (-2,0,1,0,0,-158,0,0,0),
+    (-2,0,0,2,1,129,0.1,-70,0),
+    (0,0,-1,2,2,123,0,-53,0),
+    (2,0,0,0,0,63,0,0,0),
+    (0,0,1,0,1,63,0.1,-33,0),
+    (2,0,-1,2,2,-59,0,26,0),
+    (0,0,-1,0,1,-58,-0.1,32,0),
+    (0,0,1,2,1,-51,0,27,0),
+    (-2,0,2,0,0,48,0,0,0),
+    (0,0,-2,2,1,46,0,-24,0),
+    (2,0,0,2,2,-38,0,16,0),
+    (0,0,2,2,2,-31,0,13,0),
+    (0,0,2,0,0,29,0,0,0),
+    (-2,0,1,2,2,29,0,-12,0),
+    (0,0,0,2,0,26,0,0,0),
+    (-2,0,0,2,0,-22,0,0,0),
+    (0,0,-1,2,1,21,0,-10,0),
+    (0,2,0,0,0,17,-0.1,0,0),
+    (2,0,-1,0,1,16,0,-8,0),
+    (-2,2,0,2,2,-16,0.1,7,0),
+    (0,1,0,0,1,-15,0,9,0),
+    (-2,0,1,0,1,-13,0,7,0),
+    (0,-1,0,0,1,-12,0,6,0),
+    (0,0,2,-2,0,11,0,0,0),
+    (2,0,-1,2,1,-10,0,5,0),
+    (2,0,1,2,2,-8,0,3,0),
+    (0,1,0,2,2,7,0,-3,0),
+    (-2,1,1,0,0,-7,0,0,0),
+    (0,-1,0,2,2,-7,0,3,0),
+    (2,0,0,2,1,-7,0,3,0),
+    (2,0,1,0,0,6,0,0,0),
+    (-2,0,2,2,2,6,0,-3,0),
+    (-2,0,1,2,1,6,0,-3,0),
+    (2,0,-2,0,1,-6,0,3,0),
+    (2,0,0,0,1,-6,0,3,0),
+    (0,-1,1,0,0,5,0,0,0),
+    (-2,-1,0,2,1,-5,0,3,0),
+    (-2,0,0,0,1,-5,0,3,0),
+    (0,0,2,2,1,-5,0,3,0),
+    (-2,0,2,0,1,4,0,0,0),
+    (-2,1,0,2,1,4,0,0,0),
+    (0,0,1,-2,0,4,0,0,0),
+    (-1,0,1,0,0,-4,0,0,0),
+    (-2,1,0,0,0,-4,0,0,0),
+    (1,0,0,0,0,-4,0,0,0),
+    (0,0,1,2,0,3,0,0,0),
+    (0,0,-2,2,2,-3,0,0,0),
+    (-1,-1,1,0,0,-3,0,0,0),
+    (0,1,1,0,0,-3,0,0,0),
+    (0,-1,1,2,2,-3,0,0,0),
+    (2,-1,-1,2,2,-3,0,0,0),
+    (0,0,3,2,2,-3,0,0,0),
+    (2,-1,0,2,2,-3,0,0,0),
+    )
+
+def CompileTable(matrix,args,coeffs):
+    # turn a matrix of rows into a tuple of columns; the first args columns are the arguments, followed by the columns in coeffs
+    # rows where all of the coefficients in coeffs are zero add nothing to a sum and are dropped
+    rows = [row for row in matrix if any(row[i] for i in coeffs)]
+    
+    return(tuple(tuple(row[i] for row in rows) for i in list(range(args)) + list(coeffs)))
+
+def CompilelrbTable(matrix,coeff):
+    # compile a table for lrbMatrixSum - columns are [D,M,Mdash,F, coefficient, power of E]
+    # the power of E is from 47.6 in Meeus and depends on the coefficient of M
+    D,M,Mdash,F,c = CompileTable(matrix,4,(coeff,))
+    
+    return((D,M,Mdash,F,c,tuple(abs(i) for i in M)))
+
+SumlTable = CompilelrbTable(landrMatrix,4)
+SumrTable = CompilelrbTable(landrMatrix,5)
+SumbTable = CompilelrbTable(bMatrix,4)
+
+DeltaPsiTable = CompileTable(psiepsilonMatrix,5,(5,6))
+DeltaEpsilonTable = CompileTable(psiepsilonMatrix,5,(7,8))
+
+# matrix of arguments and coefficients for the Moon Phase corrections (Meeus ch 49)
+# [ (M, Mdash, F, Ohmega), (New Moon, Full Moon, First Quarter, Last Quarter), (power of E for each of the 4 phases) ]
+CorrectionsMatrix = ( \
+    ((0,1,0,0),(-0.40720,-0.40614,-0.62801,-0.62801),(0,0,0,0)),
+    ((1,0,0,0),(0.17241,0.17302,0.17172,0.17172),(1,1,1,1)),
+    ((0,2,0,0),(0.01608,0.01614,0.00862,0.00862),(0,0,0,0)),
+    ((0,0,2,0),(0.01039,0.01043,0.00804,0.00804),(0,0,0,0)),
+    ((-1,1,0,0),(0.00739,0.00734,0.00454,0.00454),(1,1,1,1)),
+    ((1,1,0,0),(-0.00514,-0.00515,-0.01183,-0.01183),(1,1,1,1)),
+    ((2,0,0,0),(0.00208,0.00209,0.00204,0.00204),(2,2,2,2)),
+    ((0,1,-2,0),(-0.00111,-0.00111,-0.00180,-0.00180),(0,0,0,0)),
+    ((0,1,2,0),(-0.00057,-0.00057,-0.00070,-0.00070),(0,0,0,0)),
+    ((1,2,0,0),(0.00056,0.00056,0.00027,0.00027),(1,1,1,1)),
+    ((0,3,0,0),(-0.00042,-0.00042,-0.00040,-0.00040),(0,0,0,0)),
+    ((1,0,2,0),(0.00042,0.00042,0.00032,0.00032),(1,1,1,1)),
+    ((1,0,-2,0),(0.0038,0.00038,0.00032,0.00032),(1,1,1,1)),
+    ((-1,2,0,0),(-0.00024,-0.00024,-0.00034,-0.00034),(1,1,1,1)),
+    ((0,0,0,1),(-0.00017,-0.00017,-0.00017,-0.00017),(0,0,0,0)),
+    ((2,1,0,0),(-0.00007,-0.00007,-0.0028,-0.0028),(0,0,2,2)),
+    ((0,2,-2,0),(0.00004,0.00004,0.00002,0.00002),(0,0,0,0)),
+    ((3,0,0,0),(0.00004,0.00004,0.00003,0.00003),(0,0,0,0)),
+    ((1,1,-2,0),(0.00003,0.00003,0.00003,0.00003),(0,0,0,0)),
+    ((0,2,2,0),(0.00003,0.00003,0.00004,0.00004),(0,0,0,0)),
+    ((1,1,2,0),(-0.00003,-0.00003,-0.00004,-0.00004),(0,0,0,0)),
+    ((-1,1,2,0),(0.00003,0.00003,0.00002,0.00002),(0,0,0,0)),
+    ((-1,1,-2,0),(-0.00002,-0.00002,-0.00005,-0.00005),(0,0,0,0)),
+    ((1,3,0,0),(-0.00002,-0.00002,-0.00002,-0.00002),(0,0,0,0)),
+    ((0,4,0,0),(0.00002,0.00002,0,0),(0,0,0,0)),
+    ((-2,1,0,0),(0,0,0.00004,0.00004),(0,0,0,0)),
+    )
+
+def CompilePhaseTable(matrix):
+    # compile a table for PhaseCorrectionMatrixSum - columns are [M, Mdash, F, Ohmega, 4 phase coefficients, 4 phase powers of E]
+    return(tuple(tuple(row[i][j] for row in matrix) for i in range(3) for j in range(4)))
+
+PhaseCorrectionsTable = CompilePhaseTable(CorrectionsMatrix)
 
 
 def CalculateLdash(T):
@@ -247,77 +631,9 @@ def EpsilonPsi(T,D, M, Mdash, F):
 
     Ohmega = CalculateOhmega(T)
 
-    # matrix of arguments of D, M, Mdash, F and Ohmega and coefficients of delta-psi and delta-epsilon
-    # [ [D, M, Mdash, F, Ohmega, Delta-psi, Delta-epsilon] ]
-    psiepsilonMatrix = [ \
-        [0,0,0,0,1,-171996 - (174.2 * T), 92025 + (8.9 * T)],
-        [-2,0,0,2,2,-13187 - (1.6 * T),5736 - (3.1 * T)],
-        [0,0,0,2,2,-2274 - (0.2 * T),977 - (0.5 * T)],
-        [0,0,0,0,2,2062 + (0.2 * T), -895 + (0.5 * T)],
-        [0,1,0,0,0,1426 - (3.4 * T), 54 - (0.1 * T)],
-        [0,0,1,0,0,712 + (0.1 * T), -7],
-        [-2,1,0,2,2,-517 + (1.2 * T),224 - (0.6 * T)],
-        [0,0,0,2,1,-386 - (0.4 * T),200],
-        [0,0,1,2,2,-301,129 - (0.1 * T)],
-        [-2,-1,0,2,2,217 - (0.5 * T), -95 + (0.3 * T)],
-        [-2,0,1,0,0,-158,0],
-        [-2,0,0,2,1,129 + (0.1 * T),-70],
-        [0,0,-1,2,2,123,-53],
-        [2,0,0,0,0,63,0],
-        [0,0,1,0,1,63 + (0.1 * T),-33],
-        [2,0,-1,2,2,-59,26],
-        [0,0,-1,0,1,-58 - (0.1 * T),32],
-        [0,0,1,2,1,-51,27],
-        [-2,0,2,0,0,48,0],
-        [0,0,-2,2,1,46,-24],
-        [2,0,0,2,2,-38,16],
-        [0,0,2,2,2,-31,13],
-        [0,0,2,0,0,29,0],
-        [-2,0,1,2,2,29,-12],
-        [0,0,0,2,0,26,0],
-        [-2,0,0,2,0,-22,0],
-        [0,0,-1,2,1,21,-10],
-        [0,2,0,0,0,17 - (0.1 * T),0],
-        [2,0,-1,0,1,16,-8],
-        [-2,2,0,2,2,-16 + (0.1 * T),7],
-        [0,1,0,0,1,-15,9],
-        [-2,0,1,0,1,-13,7],
-        [0,-1,0,0,1,-12,6],
-        [0,0,2,-2,0,11,0],
-        [2,0,-1,2,1,-10,5],
-        [2,0,1,2,2,-8,3],
-        [0,1,0,2,2,7,-3],
-        [-2,1,1,0,0,-7,0],
-        [0,-1,0,2,2,-7,3],
-        [2,0,0,2,1,-7,3],
-        [2,0,1,0,0,6,0],
-        [-2,0,2,2,2,6,-3],
-        [-2,0,1,2,1,6,-3],
-        [2,0,-2,0,1,-6,3],
-        [2,0,0,0,1,-6,3],
-        [0,-1,1,0,0,5,0],
-        [-2,-1,0,2,1,-5,3],
-        [-2,0,0,0,1,-5,3],
-        [0,0,2,2,1,-5,3],
-        [-2,0,2,0,1,4,0],
-        [-2,1,0,2,1,4,0],
-        [0,0,1,-2,0,4,0],
-        [-1,0,1,0,0,-4,0],
-        [-2,1,0,0,0,-4,0],
-        [1,0,0,0,0,-4,0],
-        [0,0,1,2,0,3,0],
-        [0,0,-2,2,2,-3,0],
-        [-1,-1,1,0,0,-3,0],
-        [0,1,1,0,0,-3,0],
-        [0,-1,1,2,2,-3,0],
-        [2,-1,-1,2,2,-3,0],
-        [0,0,3,2,2,-3,0],
-        [2,-1,0,2,2,-3,0]
-        ]
-    
     # in seconds of arc - needs converting from dms to decimal.
-    delta_psi = psiepsilonMatrixSum(psiepsilonMatrix,5,"sin",D,M,Mdash,F,Ohmega) / 10000 
-    delta_epsilon = psiepsilonMatrixSum(psiepsilonMatrix,6,"cos",D,M,Mdash,F,Ohmega) / 10000
+    delta_psi = psiepsilonMatrixSum(DeltaPsiTable,"sin",T,D,M,Mdash,F,Ohmega) / 10000 
+    delta_epsilon = psiepsilonMatrixSum(DeltaEpsilonTable,"cos",T,D,M,Mdash,F,Ohmega) / 10000
     
     #print(delta_psi)
     #print(delta_epsilon)
@@ -348,6 +664,13 @@ def EpsilonPsi(T,D, M, Mdash, F):
 
 def RAandDec(T):
     # get the Rise Ascension (alpha) and declination (delta) of the Moon
+    # T can also be a vector of epochs, then each of the results is an array (a list without NumPy) with one value per epoch
+    
+    if Vector(T):
+        if UseNumPy:
+            return(RAandDecNumPy(np.asarray(T,dtype=float)))
+        
+        return(tuple(list(i) for i in zip(*[RAandDec(t) for t in T])))
     
     # calculate angles L', D, M, M'
     
@@ -371,144 +694,10 @@ def RAandDec(T):
     
     #print(E)
     
-    # matrix of coefficients and arguments for Sum l and Sum r (Table 47.A)
-    # l and r matrix is as follows:
-    # form is [D,M,Mdash,F, Sum l coefficient, Sum r coefficient]
-    landrMatrix = [ \
-        [0,0,1,0,6288774,-20905355],
-        [2,0,-1,0,1274027,-3699111],
-        [2,0,0,0,658314,-2955968],
-        [0,0,2,0,213618,-569925],
-        [0,1,0,0,-185116,48888],
-        [0,0,0,2,-114332,-3149],
-        [2,0,-2,0,58793,246158],
-        [2,-1,-1,0,57066,-152138],
-        [2,0,1,0,53322,-170733],
-        [2,-1,0,0,45758,-204586],
-        [0,1,-1,0,-40923,-129620],
-        [1,0,0,0,-34720,108743],
-        [0,1,1,0,-30383,104755],
-        [2,0,0,-2,15327,10321],
-        [0,0,1,2,-12528,0],
-        [0,0,1,-2,10980,79661],
-        [4,0,-1,0,10675,-34782],
-        [0,0,3,0,10034,-23210],
-        [4,0,-2,0,8548,-21636],
-        [2,1,-1,0,-7888,24208],
-        [2,1,0,0,-6766,30824],
-        [1,0,-1,0,-5163,-8379],
-        [1,1,0,0,4987,-16675],
-        [2,-1,1,0,4036,-12831],
-        [2,0,2,0,3994,-10445],
-        [4,0,0,0,3861,-11650],
-        [2,0,-3,0,3665,14403],
-        [0,1,-2,0,-2689,-7003],
-        [2,0,-1,2,-2602,0],
-        [2,-1,-2,0,2390,10056],
-        [1,0,1,0,-2348,6322],
-        [2,-2,0,0,2236,-9884],
-        [0,1,2,0,-2120,5751],
-        [0,2,0,0,-2069,0],
-        [2,-2,-1,0,2048,-4950],
-        [2,0,1,-2,-1773,4130],
-        [2,0,0,2,-1595,0],
-        [4,-1,-1,0,1215,-3958],
-        [0,0,2,2,-1110,0],
-        [3,0,-1,0,-892,3258],
-        [2,1,1,0,-810,2616],
-        [4,-1,-2,0,759,-1897],
-        [0,2,-1,0,-713,-2117],
-        [2,2,-1,0,-700,2354],
-        [2,1,-2,0,691,0],
-        [2,-1,0,-2,596,0],
-        [4,0,1,0,549,-1423],
-        [0,0,4,0,537,-1117],
-        [4,-1,0,0,520,-1571],
-        [1,0,-2,0,-487,-1739],
-        [2,1,0,-2,-399,0],
-        [0,0,2,-2,-381,-4421],
-        [1,1,1,0,351,0],
-        [3,0,-2,0,-340,0],
-        [4,0,-3,0,330,0],
-        [2,-1,2,0,327,0],
-        [0,2,1,0,-323,1165],
-        [1,1,-1,0,299,0],
-        [2,0,3,0,294,0],
-        [2,0,-1,-2,0,8752]
-        ]
-    
-    #print(landrMatrix)
-    
-    # matrix of coefficients and arguments for Sum b (Table 47.B)
-    # b matrix is as follows:
-    # form is [D,M,Mdash,F, Sum b coefficient]
-    bMatrix = [ \
-        [0,0,0,1,5128122],
-        [0,0,1,1,280602],
-        [0,0,1,-1,277693],
-        [2,0,0,-1,173237],
-        [2,0,-1,1,55413],
-        [2,0,-1,-1,46271],
-        [2,0,0,1,32573],
-        [0,0,2,1,17198],
-        [2,0,1,-1,9266],
-        [0,0,2,-1,8822],
-        [2,-1,0,-1,8216],
-        [2,0,-2,-1,4324],
-        [2,0,1,1,4200],
-        [2,1,0,-1,-3359],
-        [2,-1,-1,1,2463],
-        [2,-1,0,1,2211],
-        [2,-1,-1,-1,2065],
-        [0,1,-1,-1,-1870],
-        [4,0,-1,-1,1828],
-        [0,1,0,1,-1794],
-        [0,0,0,3,-1749],
-        [0,1,-1,1,-1565],
-        [1,0,0,1,-1491],
-        [0,1,1,1,-1475],
-        [0,1,1,-1,-1410],
-        [0,1,0,-1,-1344],
-        [1,0,0,-1,-1335],
-        [0,0,3,1,1107],
-        [4,0,0,-1,1021],
-        [4,0,-1,1,833],
-        [0,0,1,-3,777],
-        [4,0,-2,1,671],
-        [2,0,0,-3,607],
-        [2,0,2,-1,596],
-        [2,-1,1,-1,491],
-        [2,0,-2,1,-451],
-        [0,0,3,-1,439],
-        [2,0,2,1,422],
-        [2,0,-3,-1,421],
-        [2,1,-1,1,-366],
-        [2,1,0,1,-351],
-        [4,0,0,1,331],
-        [2,-1,1,1,315],
-        [2,-2,0,-1,302],
-        [0,0,1,3,-283],
-        [2,1,1,-1,-229],
-        [1,1,0,-1,223],
-        [1,1,0,1,223],
-        [0,1,-2,-1,-220],
-        [2,1,-1,-1,-220],
-        [1,0,1,1,-185],
-        [2,-1,-2,-1,181],
-        [0,1,2,1,-177],
-        [4,0,-2,-1,176],
-        [4,-1,-1,-1,166],
-        [1,0,1,-1,-164],
-        [4,0,1,-1,132],
-        [1,0,-1,-1,-119],
-        [4,-1,0,-1,115],
-        [2,-2,0,1,107],
-        ]
-    
     # calculate the sum of r, l and b
-    Sumr = lrbMatrixSum(landrMatrix,E,5,"cos",D,M,Mdash,F)
-    Suml = lrbMatrixSum(landrMatrix,E,4,"sin",D,M,Mdash,F)
-    Sumb = lrbMatrixSum(bMatrix,E,4,"sin",D,M,Mdash,F)
+    Sumr = lrbMatrixSum(SumrTable,E,"cos",D,M,Mdash,F)
+    Suml = lrbMatrixSum(SumlTable,E,"sin",D,M,Mdash,F)
+    Sumb = lrbMatrixSum(SumbTable,E,"sin",D,M,Mdash,F)
     
     #print(Sumr)
     
@@ -563,7 +752,132 @@ def RAandDec(T):
     
     return((alpha,delta,epsilon,delta_psi/3600,MoonPi))
 
-def EstimateMoon(YEAR,MONTH,DAY,Latitude, Longitude,Event):
+def RAandDecNumPy(T):
+    # as RAandDec for an array of T - the mean arguments, sums and EpsilonPsi all take arrays, so it is just the trig here that needs NumPy
+    Ldash = CalculateLdash(T)
+    D = CalculateD(T)
+    M = CalculateM(T)
+    Mdash = CalculateMdash(T)
+    F = CalculateF(T)
+    
+    A1 = (119.75 + (131.849 * T)) % 360
+    A2 = (53.09 + (479264.290 * T)) % 360
+    A3 = (313.45 + (481266.484 * T)) % 360
+    
+    E = CalculateE(T)
+    
+    Sumr = lrbMatrixSum(SumrTable,E,"cos",D,M,Mdash,F)
+    Suml = lrbMatrixSum(SumlTable,E,"sin",D,M,Mdash,F)
+    Sumb = lrbMatrixSum(SumbTable,E,"sin",D,M,Mdash,F)
+    
+    sin = lambda x: np.sin(np.radians(x))
+    
+    Suml += (3958 * sin(A1)) + (1962 * sin(Ldash - F)) + (318 * sin(A2))
+    Sumb += (-2235 * sin(Ldash)) + (382 * sin(A3)) + (175 * sin(A1 - F)) + (175 * sin(A1 + F)) + (127 * sin(Ldash - Mdash)) - (115 * sin(Ldash + Mdash))
+    
+    MoonLambda = Ldash + (Suml / 1000000)
+    MoonBeta = Sumb / 1000000
+    MoonDelta = 385000.56 + (Sumr / 1000)
+    MoonPi = np.degrees(np.arcsin(6378.14 / MoonDelta)) % 360
+    
+    delta_psi,delta_epsilon,epsilon_0,epsilon = EpsilonPsi(T,D,M,Mdash,F)
+    ApparentLambda = np.radians(MoonLambda + (delta_psi / 3600))
+    
+    MoonBeta = np.radians(MoonBeta)
+    epsilon_r = np.radians(epsilon)
+    
+    # Meeus 13.3 and 13.4 - asin already gives the declination in the range RAandDec folds it into
+    alpha = np.degrees(np.arctan2((np.sin(ApparentLambda) * np.cos(epsilon_r)) - (np.tan(MoonBeta) * np.sin(epsilon_r)),np.cos(ApparentLambda)))
+    delta = np.degrees(np.arcsin((np.sin(MoonBeta) * np.cos(epsilon_r)) + (np.cos(MoonBeta) * np.sin(epsilon_r) * np.sin(ApparentLambda))))
+    
+    return((alpha,delta,epsilon,delta_psi / 3600,MoonPi))
+
+# RAandDec only depends on T, and the same T comes up again and again - the first estimate of every day's events is from 0h, yesterday's
+# events are worked out again to check today's, and every site shares them - so positions are kept in a memo (least recently used
+# dropped once there are PositionCacheSize of them). With PositionQuantum (in days) above 0, T is rounded to a multiple of it and the
+# position is worked out there, so every T in the same PositionQuantum is given the same position whatever order they come in - 0 only
+# shares identical T.
+#
+# PositionMode "Exact" works out the position at each T. "Interpolate" only works out the position at 0h, 12h and 24h of the day
+# (through the memo, so each of them is only worked out once however many events, iterations and sites use it) and interpolates between
+# them as Meeus 3.3 - a handful of full series evaluations per day rather than dozens, for a tiny loss of accuracy.
+PositionMode = "Exact"
+PositionCacheSize = 1024
+PositionQuantum = 0
+
+PositionCache = collections.OrderedDict()
+
+# memo hits and misses (misses are full RAandDec evaluations)
+PositionHits = 0
+PositionMisses = 0
+
+def ClearPositionCache():
+    global PositionHits, PositionMisses
+    
+    PositionCache.clear()
+    RefinedEvents.clear()
+    PositionHits = 0
+    PositionMisses = 0
+
+def CachedRAandDec(T):
+    # RAandDec(T) through the memo
+    global PositionHits, PositionMisses
+    
+    if PositionQuantum > 0:
+        key = round(T * 36525 / PositionQuantum)
+    else:
+        key = T
+    
+    if key in PositionCache:
+        PositionHits += 1
+        PositionCache.move_to_end(key)
+        return(PositionCache[key])
+    
+    PositionMisses += 1
+    
+    if PositionQuantum > 0:
+        position = RAandDec(key * PositionQuantum / 36525)
+    else:
+        position = RAandDec(T)
+    
+    PositionCache[key] = position
+    
+    if len(PositionCache) > PositionCacheSize:
+        PositionCache.popitem(last = False)
+    
+    return(position)
+
+def Interpolate3(y1,y2,y3,n,Angle = False):
+    # Meeus 3.3 - interpolate between 3 evenly spaced values, n is in intervals from y2
+    # if Angle is True the values are in degrees and may have wrapped round between them
+    a = y2 - y1
+    b = y3 - y2
+    
+    if Angle:
+        a = ((a + 180) % 360) - 180
+        b = ((b + 180) % 360) - 180
+    
+    return(y2 + ((n / 2) * (a + b + (n * (b - a)))))
+
+def InterpolatedRAandDec(T):
+    # RAandDec(T) interpolated from the positions at 0h, 12h and 24h of the day T is in - Meeus 3.3 with n from -1 (0h) to 1 (24h)
+    JD = (T * 36525) + 2451545
+    JD0 = math.floor(JD - 0.5) + 0.5
+    n = (JD - (JD0 + 0.5)) / 0.5
+    
+    y1, y2, y3 = [CachedRAandDec((JD0 + i - 2451545) / 36525) for i in (0,0.5,1)]
+    
+    # right ascension may have wrapped round between the tabular values
+    return(tuple(Interpolate3(y1[i],y2[i],y3[i],n,i == 0) for i in range(5)))
+
+def Position(T):
+    # the Moon's position as RAandDec, as PositionMode says
+    if PositionMode == "Interpolate":
+        return(InterpolatedRAandDec(T))
+    
+    return(CachedRAandDec(T))
+
+def EstimateMoon(YEAR,MONTH,DAY,Latitude, Longitude,Event = None):
     # Meeus expects Longitude to be positive in the West and Negative in East
     # calculate Moon Rise and Set for iterative purposes - subsequent estimates should be obtained by increasing the DAY variable by fractions of a day i.e. DAY + (hours / 24)
     # for example DAY = 21; first estimate is 16:15, the DAY should then be entered as 21 + (16.25 / 24) = 21.67708
@@ -571,11 +885,11 @@ def EstimateMoon(YEAR,MONTH,DAY,Latitude, Longitude,Event):
     # alpha is Right Ascention (RA)
     # delta is Declination (Dec)
     # T is Julian Day in respect of JD2000
-    # Event is either "Rise","Set", or "Transit"
+    # Event is either "Rise","Set", or "Transit"; or None to get all three (rise, set, transit) from the one position calculation
     
     # check if Event matches one of the following, and if it doesn't, halt execution further
-    if ((Event != "Rise") + (Event != "Set") + (Event != "Transit")) == 3:
-        raise SystemExit('Event must be one of "Rise","Set" or "Transit"')
+    if ((Event != "Rise") + (Event != "Set") + (Event != "Transit") + (Event != None)) == 4:
+        raise SystemExit('Event must be one of "Rise","Set", "Transit" or None')
     
 
     T = CalculateT(YEAR,MONTH,DAY)
@@ -583,7 +897,7 @@ def EstimateMoon(YEAR,MONTH,DAY,Latitude, Longitude,Event):
     #print(JD)
    
     # get Right Assension, declination, apparent parallax
-    alpha,delta,epsilon,delta_psi,MoonPi = RAandDec(T)
+    alpha,delta,epsilon,delta_psi,MoonPi = Position(T)
     
     #print("alpha:", DegtoHMS(alpha), "delta:", DegtoDMS(delta), MoonPi)
     #print("alpha:", alpha, "delta:",delta, MoonPi)
@@ -607,11 +921,16 @@ def EstimateMoon(YEAR,MONTH,DAY,Latitude, Longitude,Event):
     #print("CosH0",CosH0)
     
     # check if (-1 < CosH0 < 1) is - if it isn't, then the event doesn't happen (i.e. it won't rise or set)
-    if abs(CosH0) > 1:
-        return(False)
+    Circumpolar = abs(CosH0) > 1
     
-    
-    H0 = (math.degrees(math.acos(CosH0))) % 180
+    if Circumpolar:
+        if Event in ("Rise","Set"):
+            return(False)
+        
+        # the moon still transits, so carry on with H0 as 0 and blank off rise and set at the end
+        H0 = 0
+    else:
+        H0 = (math.degrees(math.acos(CosH0))) % 180
     #print("H0", H0)
  
     nutation = delta_psi * math.cos(math.radians(epsilon))
@@ -675,7 +994,8 @@ def EstimateMoon(YEAR,MONTH,DAY,Latitude, Longitude,Event):
     
     delta_m[0] = (- (abs(H[0]) % 180) * sign) / 360
     
-    for i in range(1,3):
+    # no correction for rise and set if they don't happen
+    for i in range(1,3) if not Circumpolar else ():
         delta_m[i] = (h[i] - h0) / (360 * math.cos(math.radians(delta)) * math.cos(math.radians(Latitude)) * math.sin(math.radians(H[i])))
     
     #print("delta_m", delta_m)
@@ -684,36 +1004,102 @@ def EstimateMoon(YEAR,MONTH,DAY,Latitude, Longitude,Event):
     
     
     # return correct calculation:
-    if Event == "Rise":
+    if Event == None:
+        if Circumpolar:
+            return((False,False,m[0]))
+        
+        return((m[1],m[2],m[0]))
+    elif Event == "Rise":
         return(m[1])
     elif Event == "Set":
         return(m[2])
     else:
-        return(M[0])
+        return(m[0])
 
-    return((m[1],m[2],m[0]))
 
 
 
-def MoonTime(YEAR,MONTH,DAY,Latitude,Longitude,Event):
-    #
-    # Longitude is positive west, negative east!!
+# MoonSolver picks how MoonTime, MoonTimes and MoonTimesRange find the events:
+#    "Iterate" - each estimate is worked out again from the Moon's position at the time of the last estimate (RefineMoonEvents)
+#    "Tabular" - the Moon's positions at 0h of the day before, the day and the day after are interpolated for each estimate instead, as
+#                Meeus ch 15 (TabularMoonEvents) - only those 3 positions are worked out, and in a run of days only 1 of them is new
+MoonSolver = "Iterate"
+
+# iteration of the Moon events stops once an estimate moves by less than MoonTolerance (in hours - i.e. 1 second), or after MoonMaxIterations
+MoonTolerance = 1 / 3600
+MoonMaxIterations = 5
+
+def MoonConverged(Step,LastStep,Tolerance):
+    # check if an event has settled to within Tolerance hours; Step is how far the last estimate moved, LastStep how far the one before moved (or None)
+    # the estimates close in on the answer geometrically, so the distance still to go can be predicted from the ratio of the last two steps
+    Step = abs(Step)
+    
+    if (LastStep is not None) and (Step < abs(LastStep)):
+        ratio = Step / abs(LastStep)
+        return((Step * ratio / (1 - ratio)) < Tolerance)
+    
+    return(Step < Tolerance)
+
+def SolveMoonEvent(YEAR,MONTH,DAY,Latitude,Longitude,Event,Tolerance = MoonTolerance,MaxIterations = MoonMaxIterations):
+    # iterate a single event until it settles to within Tolerance hours
+    # returns (time of the event in decimal hours or False if it doesn't happen, number of iterations taken)
     # correction to add to day is fractions of a day
     Times = 0
-    TimesPrevDay = 0
+    Step = None
     
-    for i in range(5):
+    for i in range(1,MaxIterations + 1):
         # get the required time of the event
-        Times = EstimateMoon(YEAR,MONTH,DAY + (Times / 24),Latitude,Longitude,Event)
-        # also check yesterday's time of event
-        TimesPrevDay = EstimateMoon(YEAR,MONTH, DAY - 1 + (TimesPrevDay / 24),Latitude,Longitude,Event)
+        Estimate = EstimateMoon(YEAR,MONTH,DAY + (Times / 24),Latitude,Longitude,Event)
         
         # if result is Circumpolar, then no event
-        if Times == False:
-            return(False)
+        if Estimate is False:
+            return((False,i))
+        
+        # the first estimate is from 0h so always needs at least one more go
+        if (i > 1) and MoonConverged(Estimate - Times,Step,Tolerance):
+            return((Estimate,i))
+        
+        if i > 1:
+            Step = Estimate - Times
+        
+        Times = Estimate
+    
+    return((Times,MaxIterations))
+
+def MoonTime(YEAR,MONTH,DAY,Latitude,Longitude,Event,Tolerance = MoonTolerance,MaxIterations = MoonMaxIterations,ReturnIterations = False):
+    #
+    # Longitude is positive west, negative east!!
+    # if ReturnIterations is True, returns (result, (iterations today, iterations previous day)) - previous day is 0 if it wasn't needed
+    
+    if MoonSolver == "Tabular":
+        Times, Iterations = MoonTimes(YEAR,MONTH,DAY,Latitude,Longitude,Tolerance,MaxIterations,True)
+        
+        if ReturnIterations == True:
+            return((Times[Event],Iterations[Event]))
+        
+        return(Times[Event])
+    
+    Times, Iterations = SolveMoonEvent(YEAR,MONTH,DAY,Latitude,Longitude,Event,Tolerance,MaxIterations)
+    
+    # yesterday's time of event is only needed to check today's, so there's no need for it if there's no event today
+    if Times is False:
+        TimesPrevDay, IterationsPrevDay = False, 0
+    else:
+        TimesPrevDay, IterationsPrevDay = SolveMoonEvent(YEAR,MONTH,DAY - 1,Latitude,Longitude,Event,Tolerance,MaxIterations)
     
     #print("Time",Times, "Time Previous Day",TimesPrevDay)
     
+    if ReturnIterations == True:
+        return((CheckMoonEvent(Times,TimesPrevDay),(Iterations,IterationsPrevDay)))
+    
+    return(CheckMoonEvent(Times,TimesPrevDay))
+
+def CheckMoonEvent(Times,TimesPrevDay):
+    # Times and TimesPrevDay are the iterated times of an event today and yesterday in decimal hours (or False if there was no event)
+    
+    if Times is False:
+        return(False)
+    
     # check the difference between yesterday's and today's event, if there is less that 5 mins of difference, then the event didn't happen
     if abs(Times - TimesPrevDay) < (5/60):
         return(False)
@@ -723,20 +1109,230 @@ def MoonTime(YEAR,MONTH,DAY,Latitude,Longitude,Event):
     #print("Rise:", Hrs(trise[0]), "Set:",Hrs(tset[1]))
     return(False)
 
-def Phase(YEAR):
-    # calculate all 4 phases at once by using lists
-    # times off for Full and Last Quarter - phase correction matrix seems to nearly calculate approx the same as Meeus which could be rounding / implementation of language
+# order of the events as returned by EstimateMoon when Event is None
+MoonEvents = ("Rise","Set","Transit")
+
+# each event RefineMoonEvents has iterated, as (time, iterations) by day, place, event and settings - a day's events are iterated again as
+# the previous day of the day after (i.e. the almanac for tomorrow, or each day of a run), so they are kept and not iterated again
+# (least recently used dropped once there are RefinedEventsSize of them). Emptied by ClearPositionCache along with the positions.
+RefinedEvents = collections.OrderedDict()
+RefinedEventsSize = 64
+
+def RefineMoonEvents(YEAR,MONTH,DAY,Latitude,Longitude,Tolerance = MoonTolerance,MaxIterations = MoonMaxIterations,Events = MoonEvents):
+    # iterate the Events (any of Rise, Set and Transit) for a day together as SolveMoonEvent does for a single event
+    # returns ([rise, set, transit] in decimal hours or False where the event doesn't happen or wasn't asked for, [iterations taken by each])
+    Times = [0 if i in Events else False for i in MoonEvents]
+    Iterations = [0,0,0]
+    Steps = [None,None,None]
+    
+    # each event keeps its own state - once it has settled to within Tolerance or is found not to happen, it is left alone
+    Converged = [i not in Events for i in MoonEvents]
+    
+    # each event is iterated on its own from 0h (sharing positions doesn't change them), so an event that has already been iterated for
+    # the day is just picked up
+    keys = [(YEAR,MONTH,DAY,Latitude,Longitude,Tolerance,MaxIterations,PositionMode,PositionQuantum,i) for i in MoonEvents]
+    
+    for j in range(3):
+        if (not Converged[j]) and (keys[j] in RefinedEvents):
+            RefinedEvents.move_to_end(keys[j])
+            Times[j], Iterations[j] = RefinedEvents[keys[j]]
+            Converged[j] = True
+    
+    Refine = [not i for i in Converged]
+    
+    for i in range(MaxIterations):
+        # events that are still estimated at the same time of day share one position calculation - on the first pass this is all of them,
+        # and after that any whose estimates have come together
+        Estimates = {}
+        
+        for j in range(3):
+            if (not Converged[j]) and (Times[j] not in Estimates):
+                Estimates[Times[j]] = EstimateMoon(YEAR,MONTH,DAY + (Times[j] / 24),Latitude,Longitude)
+        
+        for j in range(3):
+            if Converged[j]:
+                continue
+            
+            t = Estimates[Times[j]][j]
+            
+            # the first estimate is from 0h so always needs at least one more go
+            Converged[j] = (t is False) or ((i > 0) and MoonConverged(t - Times[j],Steps[j],Tolerance))
+            
+            if (i > 0) and (t is not False):
+                Steps[j] = t - Times[j]
+            
+            Times[j] = t
+            Iterations[j] += 1
+        
+        if all(Converged):
+            break
+    
+    for j in range(3):
+        if Refine[j]:
+            RefinedEvents[keys[j]] = (Times[j],Iterations[j])
+            
+            if len(RefinedEvents) > RefinedEventsSize:
+                RefinedEvents.popitem(last = False)
+    
+    return((Times,Iterations))
+
+def TabularMoonEvents(YEAR,MONTH,DAY,Latitude,Longitude,Tolerance = MoonTolerance,MaxIterations = MoonMaxIterations):
+    # Rise, Set and Transit for a day as Meeus ch 15 - the Moon's right ascension and declination at 0h of the day before, the day and
+    # the day after, then each event is refined with the position interpolated to its estimate rather than worked out again
+    # returns ([rise, set, transit] in decimal hours or False where the event doesn't happen that day, [iterations taken by each])
+    # Longitude is positive west, negative east as EstimateMoon
+    positions = [CachedRAandDec(CalculateT(YEAR,MONTH,DAY + i)) for i in (-1,0,1)]
     
+    alpha = [i[0] for i in positions]
+    delta = [i[1] for i in positions]
+    epsilon, delta_psi, MoonPi = positions[1][2:]
+    
+    sinLat = math.sin(math.radians(Latitude))
+    cosLat = math.cos(math.radians(Latitude))
+    
+    # standard altitude including apparent parallax (MoonPi)  
+    h0 = (0.7275 * MoonPi) - (34/60)
+    
+    # from Meeus 15.1 - if (-1 < CosH0 < 1) isn't true, it won't rise or set
+    CosH0 = (math.sin(math.radians(h0)) - (sinLat * math.sin(math.radians(delta[1])))) / (cosLat * math.cos(math.radians(delta[1])))
+    Circumpolar = abs(CosH0) > 1
+    
+    if Circumpolar:
+        H0 = 0
+    else:
+        H0 = math.degrees(math.acos(CosH0))
+    
+    nutation = delta_psi * math.cos(math.radians(epsilon))
+    BigTheta_0 = Theta0(YEAR,MONTH,DAY) - (nutation / 15)
+    
+    # from Meeus 15.2 - as fractions of a day, in the order of MoonEvents
+    m0 = (alpha[1] + Longitude - BigTheta_0) / 360
+    m = [(m0 - (H0 / 360)) % 1,(m0 + (H0 / 360)) % 1,m0 % 1]
+    
+    Times = [False,False,False]
+    Iterations = [0,0,0]
+    
+    for j in range(3):
+        # no rise or set if it is circumpolar, but it still transits
+        if Circumpolar and (j < 2):
+            continue
+        
+        for i in range(MaxIterations):
+            # sidereal time at Greenwich, and the Moon's position interpolated to the estimate
+            theta_0 = BigTheta_0 + (360.985647 * m[j])
+            a = Interpolate3(alpha[0],alpha[1],alpha[2],m[j],True)
+            d = Interpolate3(delta[0],delta[1],delta[2],m[j])
+            
+            # local hour angle in the range -180 to +180
+            H = ((theta_0 - Longitude - a + 180) % 360) - 180
+            
+            if j == 2:
+                delta_m = -H / 360
+            else:
+                # Moons altitude as Meeus 13.6
+                h = math.degrees(math.asin((sinLat * math.sin(math.radians(d))) + (cosLat * math.cos(math.radians(d)) * math.cos(math.radians(H)))))
+                delta_m = (h - h0) / (360 * math.cos(math.radians(d)) * cosLat * math.sin(math.radians(H)))
+            
+            m[j] += delta_m
+            Iterations[j] += 1
+            
+            if abs(delta_m * 24) < Tolerance:
+                break
+        
+        # if it has moved out of the day, the event happens on the day before or after instead
+        if 0 <= m[j] < 1:
+            Times[j] = m[j] * 24
+    
+    return((Times,Iterations))
+
+def MoonEventTimes(Times,TimesPrevDay,Events = MoonEvents):
+    # combine the iterated times of today and yesterday from RefineMoonEvents into {"Rise": ..., "Set": ..., "Transit": ...} for the Events
+    return({i:CheckMoonEvent(Times[j],TimesPrevDay[j]) for j, i in enumerate(MoonEvents) if i in Events})
+
+def MoonTimes(YEAR,MONTH,DAY,Latitude,Longitude,Tolerance = MoonTolerance,MaxIterations = MoonMaxIterations,ReturnIterations = False,Events = MoonEvents):
+    # Rise, Set and Transit for a day from the one set of iterations rather than calling MoonTime for each
+    # returns {"Rise": ..., "Set": ..., "Transit": ...} where each is the same as MoonTime would return - (HRS,MIN,SEC) or False
+    # only the Events asked for are worked out and returned, i.e. Events = ("Rise","Set") if the transit isn't needed
+    # if ReturnIterations is True, returns (result, {"Rise": (iterations today, iterations previous day), ...})
+    # Longitude is positive west, negative east!!
+    if MoonSolver == "Tabular":
+        # the day before isn't needed - TabularMoonEvents knows if the events fall in the day
+        Times, Iterations = TabularMoonEvents(YEAR,MONTH,DAY,Latitude,Longitude,Tolerance,MaxIterations)
+        Times = {i:False if Times[j] is False else Hrs(Times[j]) for j, i in enumerate(MoonEvents) if i in Events}
+        
+        if ReturnIterations == True:
+            return((Times,{i:(Iterations[j],0) for j, i in enumerate(MoonEvents) if i in Events}))
+        
+        return(Times)
+    
+    Times, Iterations = RefineMoonEvents(YEAR,MONTH,DAY,Latitude,Longitude,Tolerance,MaxIterations,Events)
+    
+    # yesterday's times are only needed to check today's, so only for the events that happen today
+    Check = [i for j, i in enumerate(MoonEvents) if Times[j] is not False]
+    
+    if len(Check) > 0:
+        TimesPrevDay, IterationsPrevDay = RefineMoonEvents(YEAR,MONTH,DAY - 1,Latitude,Longitude,Tolerance,MaxIterations,Check)
+    else:
+        TimesPrevDay, IterationsPrevDay = [False,False,False], [0,0,0]
+    
+    if ReturnIterations == True:
+        return((MoonEventTimes(Times,TimesPrevDay,Events),{i:(Iterations[j],IterationsPrevDay[j]) for j, i in enumerate(MoonEvents) if i in Events}))
+    
+    return(MoonEventTimes(Times,TimesPrevDay,Events))
+
+def MoonTimesRange(start,end,Latitude,Longitude,Tolerance = MoonTolerance,MaxIterations = MoonMaxIterations,Events = MoonEvents):
+    # generator which gives (date, {"Rise": ..., "Set": ..., "Transit": ...}) for every day from start to end (both included) - only the
+    # Events asked for, as MoonTimes
+    # start and end are datetime.date objects, Longitude is positive west, negative east as MoonTime
+    # each event is the same as MoonTime would return - (HRS,MIN,SEC) or False if it doesn't happen that day
+    #
+    # each day is only iterated once - its times are kept and used as the previous day for the day after
+    
+    if MoonSolver == "Tabular":
+        DAY = start
+        
+        while DAY <= end:
+            yield((DAY,MoonTimes(DAY.year,DAY.month,DAY.day,Latitude,Longitude,Tolerance,MaxIterations,Events = Events)))
+            DAY += dt.timedelta(days = 1)
+        
+        return
+    
+    DAY = start - dt.timedelta(days = 1)
+    TimesPrevDay = RefineMoonEvents(DAY.year,DAY.month,DAY.day,Latitude,Longitude,Tolerance,MaxIterations,Events)[0]
+    
+    DAY = start
+    
+    while DAY <= end:
+        Times = RefineMoonEvents(DAY.year,DAY.month,DAY.day,Latitude,Longitude,Tolerance,MaxIterations,Events)[0]
+        
+        yield((DAY,MoonEventTimes(Times,TimesPrevDay,Events)))
+        
+        TimesPrevDay = Times
+        DAY += dt.timedelta(days = 1)
+
+def Phase(YEAR):
     # YEAR to include fractional part to define month - beware that Month does not necessarily mean the event will occur in that month, and also event could happen twice in the month (blue moon for example)
     # also calculation is centric on New Month.
     
     # calculate k Meeus 49.2
     k_orig = ((YEAR) - 2000) * 12.3685
     
+    JDE = LunationJDE(math.floor(k_orig))
+    
+    # create dictionary - labels for dict
+    PhaseLabel = ["New Moon","Full Moon","First Quarter", "Last Quarter"]
+    
+    return(dict(zip(PhaseLabel,[CalendarDate(i) for i in JDE])))
+
+def LunationJDE(lunation):
+    # JDE of the 4 phases of lunation number lunation (0 is the New Moon of 6 Jan 2000) in the order New Moon, Full Moon, First Quarter, Last Quarter
+    # calculate all 4 phases at once by using lists
+    # times off for Full and Last Quarter - phase correction matrix seems to nearly calculate approx the same as Meeus which could be rounding / implementation of language
+    
     # k is integer at New Moon, First quarter is +0.25; Full Moon is +0.5; Last Quarter is 0.75
     k = [0] * 4
     kphasedecimal = [0,0.5,0.25,0.75] # this looks a bit odd, but the calculations below work in the order of: New Moon, Full Moon, First Quarter and Last Quarter
-    k = [math.floor(k_orig) + i for i in kphasedecimal ]
+    k = [lunation + i for i in kphasedecimal ]
     #print("k",k)
     
     # calculate T Meeus 49.3
@@ -810,39 +1406,6 @@ def Phase(YEAR):
     #E = [1,1,1,1]
     
     # [ M, Mdash, F, Ohmega, New Moon, Full Moon, First & Last Quarter]    
-    CorrectionsMatrix = [ \
-        [0,1,0,0,-0.40720,-0.40614,-0.62801,-0.62801],
-        [1,0,0,0, 0.17241 * E[0], 0.17302 * E[1],0.17172 * E[2],0.17172 * E[3] ],
-        [0,2,0,0,0.01608,0.01614,0.00862,0.00862],
-        [0,0,2,0,0.01039,0.01043,0.00804,0.00804],
-        [-1,1,0,0,0.00739 * E[0], 0.00734 * E[1],0.00454 * E[2],0.00454 * E[3]],
-        [1,1,0,0,-0.00514 * E[0], -0.00515 * E[1],-0.01183 * E[2],-0.01183 * E[3]],
-        [2,0,0,0,0.00208 * E[0] * E[0], 0.00209 * E[1] * E[1],0.00204 * E[2] * E[2],0.00204 * E[3] * E[3]],
-        [0,1,-2,0,-0.00111,-0.00111,-0.00180,-0.00180],
-        [0,1,2,0,-0.00057,-0.00057,-0.00070,-0.00070],
-        [1,2,0,0,0.00056 * E[0],0.00056 * E[1],0.00027 * E[2],0.00027 * E[3]],
-        [0,3,0,0,-0.00042,-0.00042,-0.00040,-0.00040],
-        [1,0,2,0,0.00042 * E[0], 0.00042 * E[1],0.00032 * E[2],0.00032 * E[3]],
-        [1,0,-2,0,0.0038 * E[0], 0.00038 * E[1],0.00032 * E[2],0.00032 * E[3]],
-        [-1,2,0,0,-0.00024 * E[0], -0.00024 * E[1],-0.00034 * E[2],-0.00034 * E[3]],
-        [0,0,0,1,-0.00017,-0.00017,-0.00017,-0.00017],
-        [2,1,0,0,-0.00007,-0.00007,-0.0028 * E[2] * E[2],-0.0028 * E[3] * E[3]],
-        [0,2,-2,0,0.00004,0.00004,0.00002,0.00002],
-        [3,0,0,0,0.00004,0.00004,0.00003,0.00003],
-        [1,1,-2,0,0.00003,0.00003,0.00003,0.00003],
-        [0,2,2,0,0.00003,0.00003,0.00004,0.00004],
-        [1,1,2,0,-0.00003,-0.00003,-0.00004,-0.00004],
-        [-1,1,2,0,0.00003,0.00003,0.00002,0.00002],
-        [-1,1,-2,0,-0.00002,-0.00002,-0.00005,-0.00005],
-        [1,3,0,0,-0.00002,-0.00002,-0.00002,-0.00002],
-        [0,4,0,0,0.00002,0.00002,0,0],
-        [-2,1,0,0,0,0,0.00004,0.00004]
-            ]
-    # DEBUG
-    #N = []
-    #for row in CorrectionsMatrix:
-    #    N.append([row[0],row[1],row[2],row[3],row[5]])
-    #print(N)
     
     
     # W for quarter phases only
@@ -851,7 +1414,7 @@ def Phase(YEAR):
     #print("W",W)
 
     # calculate phase correction from the matrix above.
-    ApparentPhase = PhaseCorrectionMatrixSum(CorrectionsMatrix,M,Mdash,F,Ohmega)
+    ApparentPhase = PhaseCorrectionMatrixSum(PhaseCorrectionsTable,E,M,Mdash,F,Ohmega)
     
     #print("ApparentPhase",ApparentPhase)
        
@@ -873,7 +1436,67 @@ def Phase(YEAR):
     
     #print("Final ApparentPhase",ApparentPhase, "JDE",JDE[3] + ApparentPhase[3])
     
-    # create dictionary - labels for dict
-    PhaseLabel = ["New Moon","Full Moon","First Quarter", "Last Quarter"]
+    return([JDE[i] + ApparentPhase[i] for i in range(4)])
+
+# the 8 phases of the moon in order through a lunation
+PhaseNames = ('New Moon','Waxing Crescent','First Quarter','Waxing Gibbous','Full Moon','Waning Gibbous','Last Quarter','Waning Crescent')
+
+# the phase tracker - JDE of each cardinal phase in order (New Moon, First Quarter, Full Moon, Last Quarter, New Moon...) from lunation
+# number PhaseFirst on, worked out PhaseBlock lunations at a time as they are needed and kept, so it is only a lookup for each day
+PhaseFirst = None
+PhaseJDE = array.array('d')
+PhaseBlock = 13
+
+def ClearPhases():
+    global PhaseFirst
+    
+    PhaseFirst = None
+    del PhaseJDE[:]
+
+def TrackPhases(JD):
+    # make sure the tracker runs from before JD to after it, adding PhaseBlock lunations to whichever end is short
+    global PhaseFirst
+    
+    # LunationJDE gives New Moon, Full Moon, First Quarter, Last Quarter - put them in order through the lunation
+    order = lambda JDE: (JDE[0],JDE[2],JDE[1],JDE[3])
+    
+    # to start with, just the lunation JD is in (Meeus 49.2) and the ones either side
+    if PhaseFirst == None:
+        PhaseFirst = math.floor((JD - 2451550.09766) / 29.530588861) - 1
+        PhaseJDE.extend([j for i in range(PhaseFirst,PhaseFirst + 3) for j in order(LunationJDE(i))])
     
-    return(dict(zip(PhaseLabel,[CalendarDate(JDE[i] + ApparentPhase[i]) for i in range(4)])))
\ No newline at end of file
+    while JD < PhaseJDE[0]:
+        PhaseFirst -= PhaseBlock
+        PhaseJDE[0:0] = array.array('d',[j for i in range(PhaseFirst,PhaseFirst + PhaseBlock) for j in order(LunationJDE(i))])
+    
+    while JD >= PhaseJDE[-1]:
+        last = PhaseFirst + (len(PhaseJDE) // 4)
+        PhaseJDE.extend([j for i in range(last,last + PhaseBlock) for j in order(LunationJDE(i))])
+
+def PhaseAt(JD):
+    # (which of the 8 phases the moon is in, fraction of it that is lit) at JD
+    # a cardinal phase lasts for the whole (UT) day that it happens on, and the phases in between are the half phases
+    # the fraction lit comes from the elongation, taken to go round evenly between the cardinal phases - good to a few % 
+    TrackPhases(JD)
+    
+    # the last cardinal phase at or before JD
+    i = bisect.bisect_right(PhaseJDE,JD) - 1
+    
+    # days start at JD n.5
+    day = math.floor(JD - 0.5)
+    
+    if math.floor(PhaseJDE[i] - 0.5) == day:
+        octant = 2 * (i % 4)
+    elif math.floor(PhaseJDE[i + 1] - 0.5) == day:
+        octant = 2 * ((i + 1) % 4)
+    else:
+        octant = (2 * (i % 4)) + 1
+    
+    elongation = 90 * ((i % 4) + ((JD - PhaseJDE[i]) / (PhaseJDE[i + 1] - PhaseJDE[i])))
+    
+    return((octant,(1 - math.cos(math.radians(elongation))) / 2))
+
+def PhaseOfDay(YEAR,MONTH,DAY):
+    # which of the 8 phases the moon is in on a day - returns the index into PhaseNames
+    # from the phase tracker - the cardinal phases are only worked out once, so a run of days is only a lookup for each
+    return(PhaseAt(JulianDay(YEAR,MONTH,DAY))[0])
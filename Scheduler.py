@@ -0,0 +1,160 @@
+# Tick scheduler
+#
+# Sleeps until the start of each second rather than polling for the second to change, and runs the jobs that are due on that tick.
+# Sleeping is timed with the monotonic clock so that it isn't thrown by the wall clock being changed (i.e. NTP or the RTC setting the
+# time after boot) - if the wall clock does jump, the ticks are lined back up with it.
+#
+# Jobs are registered with EverySecond(job), EveryMinute(job) or Daily(job,hour,minute,second) and called as job(NOW) where NOW is
+# the datetime of the second being ticked, then Run() starts ticking (or RunAsync() from within asyncio). Jobs run in the order they
+# were registered.
+# Minute and Daily jobs remember when they last ran, so they still run (late) if the tick they were due on was missed.
+#
+# How late each tick ran is kept in Lateness (seconds after the start of the second); ticks later than LateLimit are printed and counted
+# in LateTicks, and if a tick overran the next second completely the seconds that were missed are counted in MissedTicks.
+
+import math
+import asyncio
+import time as tm
+import datetime as dt
+
+# jobs started as tasks by RunAsync - kept so they aren't garbage collected while they run
+Tasks = set()
+
+# registered jobs as [how often, job, (time of day, Startup) for Daily jobs, minute or day it last ran]
+Jobs = []
+
+# lateness of the last tick, worst lateness so far and counts of late / missed ticks
+Lateness = 0
+MaxLateness = 0
+LateTicks = 0
+MissedTicks = 0
+
+# ticks later than this (in seconds) are reported
+LateLimit = 0.1
+
+# how far the wall clock can move against the monotonic clock before the ticks are lined back up with it
+ResyncLimit = 0.05
+
+def EverySecond(job):
+    Jobs.append(["Second",job,None,None])
+
+def EveryMinute(job):
+    # runs on the tick at the start of each minute
+    Jobs.append(["Minute",job,None,None])
+
+def Daily(job,hour = 0,minute = 0,second = 0,Startup = True):
+    # runs once a day at hour:minute:second, and also on the first tick if Startup is True so there is something to show straight away
+    Jobs.append(["Daily",job,(dt.time(hour,minute,second),Startup),None])
+
+def Due(entry,NOW,first):
+    # check if a job is due on this tick, and if it is, note that it has run
+    how, job, when, last = entry
+
+    if how == "Second":
+        return(True)
+
+    if how == "Minute":
+        this = NOW.replace(second = 0)
+        due = (this != last) and ((NOW.second == 0) or (last != None))
+    else:
+        # only counts as today's run if it's past the time - a Startup run before the time still leaves today's run to do
+        this = NOW.date() if NOW.time() >= when[0] else last
+        due = (this != last) or (first and when[1])
+
+    entry[3] = this
+
+    return(due)
+
+def Sync():
+    # line up with the next second of the wall clock - returns (monotonic time the next tick is due, wall clock second of that tick)
+    wall = tm.time()
+    second = math.floor(wall) + 1
+
+    return((tm.monotonic() + (second - wall),second))
+
+def Record(late):
+    # keep track of how late the ticks are running
+    global Lateness, MaxLateness, LateTicks
+
+    Lateness = late
+    MaxLateness = max(MaxLateness,late)
+
+    if late > LateLimit:
+        LateTicks += 1
+        print("Tick late by", round(late,3), "s")
+
+def Advance(deadline,second):
+    # move on to the next tick - returns (monotonic time the next tick is due, wall clock second of that tick)
+    global MissedTicks
+
+    deadline += 1
+    second += 1
+
+    # if the jobs ran past the next tick, skip the seconds that have already gone
+    behind = math.floor(tm.monotonic() - deadline)
+
+    if behind > 0:
+        MissedTicks += behind
+        print("Missed", behind, "ticks")
+
+        deadline += behind
+        second += behind
+
+    # line back up if the wall clock has been changed
+    if abs((tm.time() - second) - (tm.monotonic() - deadline)) > ResyncLimit:
+        deadline, second = Sync()
+
+    return((deadline,second))
+
+def Run():
+    # tick forever, running the jobs that are due on each tick
+    deadline, second = Sync()
+    first = True
+
+    while True:
+        # sleep right up to the start of the second
+        delay = deadline - tm.monotonic()
+
+        if delay > 0:
+            tm.sleep(delay)
+
+        Record(tm.monotonic() - deadline)
+
+        NOW = dt.datetime.fromtimestamp(second)
+
+        for entry in Jobs:
+            if Due(entry,NOW,first):
+                entry[1](NOW)
+
+        first = False
+
+        deadline, second = Advance(deadline,second)
+
+async def RunAsync():
+    # as Run, but for an asyncio event loop - other tasks run while waiting for the next tick
+    # jobs that are coroutine functions are started as tasks of their own rather than waited on, so a slow job can't hold up the ticks
+    deadline, second = Sync()
+    first = True
+
+    while True:
+        delay = deadline - tm.monotonic()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        Record(tm.monotonic() - deadline)
+
+        NOW = dt.datetime.fromtimestamp(second)
+
+        for entry in Jobs:
+            if Due(entry,NOW,first):
+                result = entry[1](NOW)
+
+                if asyncio.iscoroutine(result):
+                    task = asyncio.ensure_future(result)
+                    Tasks.add(task)
+                    task.add_done_callback(Tasks.discard)
+
+        first = False
+
+        deadline, second = Advance(deadline,second)
@@ -1,118 +1,174 @@
-import board
-
-from adafruit_ht16k33 import matrix
-from time import sleep
-
 import Config
+import Hardware
 
-i2c = board.I2C()
-
-# create the object which is the matrix of segments
+# the HT16K33's in the config - nothing touches the i2c bus until init_display opens them, which dispupdate does if it hasn't been done
 SegMatrix = []
 
-# iterate through all the HT16K33's in the config, and add them to a list of objects to interact with
-for i in Config.HT16K33:
-    SegMatrix.append(matrix.Matrix16x8(i2c,address = int(str(i),16), auto_write = False))
-
-# clear current display and set brightness to 100%
-for i in range(0,len(SegMatrix)):
-    SegMatrix[i].fill(0)
-    SegMatrix[i].brightness = 0.05
-    
+# the display is drawn into a frame buffer per HT16K33 first - 16 bytes laid out as the HT16K33 display RAM, so each bank (digit) is one byte
+# with a bit per segment (see cell), and bytes 2r and 2r+1 make up the 16 bit row r.
+# Frame is what has been drawn, Shown is what was last sent to the HT16K33 (None if not known, so all of it is sent next time) - dispupdate
+# only sends the part that differs, and nothing at all if nothing does, as the i2c bus is shared with the BME280 and DS3231
+Frame = [bytearray(16) for i in Config.HT16K33]
+Shown = [None for i in Config.HT16K33]
+
+# bytes sent to each HT16K33 by its last dispupdate, and in total since starting
+FrameBytes = [0 for i in Config.HT16K33]
+BytesSent = 0
+
+def init_display():
+    # open all the HT16K33's in the config - blanked and at 5% brightness - if they aren't already
+    if len(SegMatrix) == 0:
+        for i in Config.HT16K33:
+            SegMatrix.append(Hardware.DisplayOpen(int(str(i),16)))
+
+def cell(bank):
+    # the byte in the display RAM for a bank - banks 0-7 are the low byte of rows 0-7, banks 8-15 the high byte
+    if bank < 8:
+        return(2 * bank)
+    else:
+        return((2 * (bank - 8)) + 1)
+
+
+# segment masks for each glyph - bit n lights segment n, where 0 is the top segment going clockwise, 6 the middle and 7 the decimal point
+Glyphs = {'0':0x3F,
+          '1':0x06,
+          '2':0x5B,
+          '3':0x4F,
+          '4':0x66,
+          '5':0x6D,
+          '6':0x7D,
+          '7':0x07,
+          '8':0x7F,
+          '9':0x6F,
+          '.':0x80,
+          ' ':0x00,
+          'b':0x7C,
+          't':0x78,
+          'I':0x30,
+          'n':0x54,
+          's':0x6D,
+          'd':0x5E,
+          'c':0x39,
+          'e':0x7B,
+          'r':0x50,
+          'o':0x5C,
+          '-':0x40,
+          '|':0x06, # end bar
+          '-|':0x46,
+          '|-':0x70,
+          'E':0x79}
+
+# glyphs by their old index numbers - 0 to 9 are the digits themselves. 24 (add a dot to what is there) is add_dot
+GlyphIndex = {11:'.',12:' ',13:'b',14:'t',15:'I',16:'n',17:'s',18:'d',19:'c',20:'e',21:'r',22:'o',23:'-',25:'|',26:'-|',27:'|-'}
 
 def glyph(g):
-    # return an tuple with the digits to set as on for the glyph it represents. Not to be called directly, but through a function. It won't explode, but just don't do it
-    # returns [glyph segments, antiglyph segments for blanking]
-    #
-    # glyphs are 0 for the top seg going clockwise with 7 as the decimal point. 
-    # THESE ARE GLYPH INDEXS for clarity
-    
-    if g == 1: # 1
-        return [(1,2),(0,3,4,5,6,7)]
-    elif g == 2: # 2
-        return [(0,1,6,4,3),(2,5,7)]
-    elif g == 3: # 3
-        return [(0,1,6,2,3),(4,5,7)]
-    elif g == 4: # 4
-        return [(5,6,1,2),(0,4,3,7)]
-    elif g == 5: # 5
-        return [(0,5,6,2,3),(1,4,7)]
-    elif g == 6: # 6
-        return [(0,5,4,3,2,6),(1,7)]
-    elif g == 7: # 7
-        return [(0,1,2),(5,6,4,3,7)]
-    elif g == 8: # 8
-        return [(0,1,2,3,4,5,6),(7,)]
-    elif g == 9: # 9
-        return [(0,5,6,1,2,3),(4,7)]
-    elif g == 0: # 0
-        return [(0,1,2,3,4,5),(6,7)]
-    elif g == 11: # .
-        return [(7,),(1,2,3,4,5,6)]
-    elif g == 12: # [blank / space]
-        return [(),(0,1,2,3,4,5,6,7)]
-    elif g == 13: # b
-        return [(5,4,3,2,6),(0,1,7)]
-    elif g == 14: # t
-        return [(5,4,3,6),(0,1,2,7)]
-    elif g == 15: # I
-        return [(4,5),(0,1,2,3,6,7)]
-    elif g == 16: # n
-        return [(2,4,6),(0,1,3,5,7)]
-    elif g == 17: # s
-        return [(0,5,6,2,3),(1,4,7)]
-    elif g == 18: # d
-        return [(1,2,3,4,6),(0,5,7)]
-    elif g == 19: # c
-        return [(0,3,4,5),(1,2,6,7)]
-    elif g == 20: # e
-        return [(0,5,6,1,4,3),(2,7)]
-    elif g == 21: # r
-        return [(4,6),(0,1,2,3,5,7)]
-    elif g == 22: # o
-        return [(6,2,3,4),(0,1,5,7)]
-    elif g == 23: # -
-        return[(6,),(0,1,2,3,4,5,7)]
-    elif g == 24: # add dot to existing
-        return[(7,),()]
-    elif g == 25: # end bar |
-        return[(1,2),(0,3,4,5,6,7)]
-    elif g == 26: # -|
-        return[(1,2,6),(0,3,4,5,7)]
-    elif g == 27: # |-
-        return[(4,5,6),(0,1,2,3,7)]
-
-    else: # return an E
-        return [(0,5,6,4,3),(1,2,7)]
-
-def disp(d, bank, addr,gen=[(0,0,0,0,0,0,0,0),()]):
-    # plot a glyph based on index d and display it on the bank noted,
-    # gen is (if relevant) a generic glyph to operate the LEDs; d == 99 for this mode
-
-    if d != 99:
-        # get the glyphs and anti-glyphs for digit g
-        g,a = glyph(d)
+    # the segment mask for a glyph - g is one of the Glyphs, or a number (a digit 0-9 or one of GlyphIndex). Anything else is shown as an E
+    if isinstance(g,int):
+        if 0 <= g <= 9:
+            g = str(g)
+        else:
+            g = GlyphIndex.get(g,'E')
+
+    return(Glyphs.get(g,Glyphs['E']))
+
+def disp(d,bank,addr):
+    # show glyph d (see glyph) on the bank noted - it replaces the whole digit, dot included
+    if d == 24:
+        add_dot(bank,addr)
     else:
-        g,a = gen
-
-    #print(g,a)
-    # glyphs to light
-    for i in g:
-        #print("on:",i)
-        SegMatrix[addr][bank,i] = 1
-        
-    # glyphs to blank off
-    for i in a:
-        #print("off:",i)
-        SegMatrix[addr][bank,i] = 0
-
-def gendisp(addr,):
-    SegMatrix[addr][x,y] = state
+        Frame[addr][cell(bank)] = glyph(d)
+
+def render(text):
+    # the segment masks for a string - a '.' goes on the digit before it rather than taking up a digit of its own
+    masks = []
+
+    for ch in text:
+        if (ch == '.') and (len(masks) > 0) and not (masks[-1] & Glyphs['.']):
+            masks[-1] |= Glyphs['.']
+        else:
+            masks.append(glyph(ch))
+
+    return(masks)
+
+# pages - parts of a frame rendered ahead of time, so that showing them is just a copy into the frame buffer
+# a page is a list of (byte of the display RAM, segments to light, segments to leave as they are) - anything else in that byte is blanked.
+# Pages for the same HT16K33 can be joined with +
+
+def text_page(start_bank,text,width = None):
+    # a page showing a string on the banks from start_bank on, i.e. text_page(4,"12.34") is 1 2. 3 4 on banks 4 to 7
+    # if width is given the string fills exactly that many banks - right aligned with blanks in front, or cut short if it is too long
+    masks = render(text)
+
+    if width != None:
+        masks = ([Glyphs[' ']] * (width - len(masks)) + masks)[:width]
+
+    return([(cell(start_bank + i),masks[i],0x00) for i in range(0,len(masks))])
+
+def led_page(bank,on,group = 0xFF):
+    # a page setting the LEDs of a bank that are in group (a mask, bit n for LED n) - the ones in on are lit and the rest of the group
+    # blanked; LEDs outside the group are left as they are, so a bank can be shared between indicators
+    return([(cell(bank),on & group,0xFF ^ group)])
+
+def show_page(addr,page):
+    # copy a page into the frame buffer
+    frame = Frame[addr]
+
+    for i, on, keep in page:
+        frame[i] = (frame[i] & keep) | on
+
+def update_pages(pages,inputs,build):
+    # re-render the pages whose inputs have changed - pages is a list of (inputs, page), or None for pages not rendered yet,
+    # and build(i,inputs[i]) renders page i
+    for i in range(0,len(inputs)):
+        if (pages[i] == None) or (pages[i][0] != inputs[i]):
+            pages[i] = (inputs[i],build(i,inputs[i]))
+
+def write_text(addr,start_bank,text,width = None):
+    # show a string straight away - see text_page
+    show_page(addr,text_page(start_bank,text,width))
+
+def leds(bank,addr,on,group = 0xFF):
+    # set the LEDs of a bank straight away - see led_page
+    show_page(addr,led_page(bank,on,group))
 
 def add_dot(bank,addr):
-    SegMatrix[addr][bank,7] = 1
+    Frame[addr][cell(bank)] |= 1 << 7
+
+def changed_range(addr):
+    # the first and last byte of the display RAM that have changed, or None if nothing has
+    if Shown[addr] == None:
+        return((0,15))
+
+    changed = [i for i in range(0,16) if Frame[addr][i] != Shown[addr][i]]
+
+    if len(changed) == 0:
+        return(None)
+
+    return((changed[0],changed[-1]))
 
 def dispupdate(addr):
-    SegMatrix[addr].show()
+    # send the frame to the HT16K33 if it has changed since it was last sent - returns the number of bytes sent over i2c
+    # only the run of display RAM from the first to the last changed byte is sent, in one write: the RAM address to start at followed
+    # by the data, which the HT16K33 stores from there on as it auto-increments the address. show() would send all 16 bytes every time
+    global BytesSent
+
+    init_display()
+
+    span = changed_range(addr)
+
+    if span == None:
+        sent = 0
+    else:
+        first, last = span
+        data = bytes([first]) + Frame[addr][first:last + 1]
+
+        Hardware.DisplayWrite(SegMatrix[addr],data)
+
+        Shown[addr] = bytearray(Frame[addr])
+
+        sent = len(data)
 
+    FrameBytes[addr] = sent
+    BytesSent += sent
 
+    return(sent)
@@ -0,0 +1,63 @@
+# BME280 sensor service
+#
+# Keeps the last reading and when it was taken, and only reads the sensor again once that reading is older than Interval seconds - each
+# reading is a forced measurement and an i2c transfer on the bus the displays use, and measuring warms the sensor up a little too.
+# Oversampling (1, 2, 4, 8 or 16) is how many samples the BME280 averages for each measurement - less noise, but a longer measurement.
+#
+# Open() opens the sensor (it is also opened by the first Read), Read() gives the reading - from the cache unless it is stale - with
+# .temperature, .humidity and .pressure as bme280.sample does.
+
+import time as tm
+
+import Config
+import Hardware
+
+Interval = Config.SensorInterval
+Oversampling = Config.SensorOversampling
+
+# the open sensor, and the last reading with the time (monotonic clock) and wall clock time it was taken
+Device = None
+Last = None
+LastTime = None
+LastWhen = None
+
+# number of times the sensor has actually been read
+Reads = 0
+
+def Open():
+    global Device
+
+    if Device == None:
+        Device = Hardware.SensorOpen()
+
+def Age():
+    # seconds since the last reading was taken, None if there hasn't been one
+    if Last == None:
+        return(None)
+
+    return(tm.monotonic() - LastTime)
+
+def Stale():
+    # True if there is no reading, or it is older than Interval
+    return((Last == None) or (Age() >= Interval))
+
+def Wait():
+    # seconds until the reading goes stale
+    if Stale():
+        return(0)
+
+    return(Interval - Age())
+
+def Read(Force = False):
+    # the reading - only read from the sensor if the last one is stale (or Force is True)
+    global Last, LastTime, LastWhen, Reads
+
+    if Force or Stale():
+        Open()
+
+        Last = Hardware.SensorRead(Device,Oversampling)
+        LastTime = tm.monotonic()
+        LastWhen = tm.time()
+        Reads += 1
+
+    return(Last)
@@ -12,6 +12,11 @@
 #
 # Produces a dictionary of Tuples with rise and set times; all times are in decimal time - i.e. 07:15 = 7.25; 07:45 = 7.75 etc
 #
+# For charts over many days (and / or sites) call SunTimesBatch(dates, latitude, longitude, offset (optional)) - dates is a list of
+# datetime.date, and latitude / longitude are either single values or one per date. NumPy arrays broadcast, so i.e. latitudes and
+# longitudes of shape (sites,1) give (sites,days) of results. Produces the same dictionary but with (rise array, set array), NaN where
+# the rise / set doesn't happen - NumPy arrays if NumPy is installed, lists otherwise
+#
 # Method used is from:
 # Almanac for Computers, 1990
 # published by Nautical Almanac Office
@@ -20,6 +25,15 @@
 
 import math
 
+# NumPy is optional - if it is installed SunTimesBatch works on whole arrays at once, otherwise it calls SunTimes for each day
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# set to False to force SunTimesBatch to use SunTimes even when NumPy is available
+UseNumPy = np is not None
+
 def DayOfYear(YEAR,MONTH,DAY):
     
     # calculates the day of the year and return the day number
@@ -30,12 +44,16 @@ def DayOfYear(YEAR,MONTH,DAY):
     return(N1 - (N2 * N3) + DAY - 30)
     
 
+# labels of the rise and set times given by SunTimes, in the order they are calculated
+zenith_labels = ['Official','Civil','Nautical','Astronomical','Golden']
+
+# the zenith for each of zenith_labels, and its cosine which is what the calculations use - worked out the once here
+zenith_angles = [90 + 50/60, 96, 102, 108, 84]
+zenith_cos = [math.cos(math.radians(i)) for i in zenith_angles]
+
 def SunTimes(YEAR, MONTH, DAY, latitude, longitude, offset = 0):
     
-    zenith = [90 + 50/60, 96, 102, 108, 84]
-    zenith_labels = ['Official','Civil','Nautical','Astronomical','Golden']
-    # convert zenith's for ease of calcs further on
-    zenith = [math.cos(math.radians(i)) for i in zenith]
+    zenith = zenith_cos
     #zenith = [0.10472,-0.01454, -0.10453, -0.20791, -0.30902]
     # golden 84 deg approx 0.10472
     # official 90 deg 50' approx -0.01454
@@ -93,9 +111,12 @@ def SunTimes(YEAR, MONTH, DAY, latitude, longitude, offset = 0):
     # cosH = [[rise:official,rise:civil, etc], [set:official,set:civil, etc]]
     
     cosH = [0] * 2
+
+    sinLat = math.sin(math.radians(latitude))
+    cosLat = math.cos(math.radians(latitude))
     
     for i in range(2):
-        cosH[i] = [(j - (sinDec[i] * math.sin(math.radians(latitude)))) / (cosDec[i] * math.cos(math.radians(latitude))) for j in zenith]
+        cosH[i] = [(j - (sinDec[i] * sinLat)) / (cosDec[i] * cosLat) for j in zenith]
     
     #7b finish calculating H and convert into hours
     
@@ -114,7 +135,7 @@ def SunTimes(YEAR, MONTH, DAY, latitude, longitude, offset = 0):
         if abs(cosH[1][i]) > 1:
             H[1][i] = False
         else:
-            H[1][i] = math.degrees(math.acos(cosH[0][i])) / 15
+            H[1][i] = math.degrees(math.acos(cosH[1][i])) / 15
         
     # 8 Calculate local mean time of rising / setting
     #T = H + RA - (0.06571 * t) - 6.622
@@ -133,4 +154,71 @@ def SunTimes(YEAR, MONTH, DAY, latitude, longitude, offset = 0):
     
     OUT = dict(zip(zenith_labels,list(zip(T[0],T[1]))))
     
-    return(OUT)
\ No newline at end of file
+    return(OUT)
+
+
+def SunTimesBatch(dates, latitude, longitude, offset = 0):
+    # SunTimes for a list of dates - see the top of the file
+    if UseNumPy:
+        return(SunTimesNumPy(dates, latitude, longitude, offset))
+
+    n = len(dates)
+
+    # single values are used for every date
+    if not isinstance(latitude,(list,tuple)):
+        latitude = [latitude] * n
+    if not isinstance(longitude,(list,tuple)):
+        longitude = [longitude] * n
+
+    days = [SunTimes(dates[i].year,dates[i].month,dates[i].day,latitude[i],longitude[i],offset) for i in range(n)]
+
+    return({j:tuple([math.nan if day[j][k] is False else day[j][k] for day in days] for k in range(2)) for j in zenith_labels})
+
+def SunTimesNumPy(dates, latitude, longitude, offset = 0):
+    # SunTimesBatch with NumPy - the same steps as SunTimes, on arrays; the zeniths are an extra first axis until the end
+
+    # 1 calculate the day of the year
+    N = np.array([DayOfYear(i.year,i.month,i.day) for i in dates],dtype=float)
+
+    # 2 convert the logitude to hour value
+    lngHour = np.asarray(longitude,dtype=float) / 15
+
+    sinLat = np.sin(np.radians(np.asarray(latitude,dtype=float)))
+    cosLat = np.cos(np.radians(np.asarray(latitude,dtype=float)))
+
+    zenith = np.array(zenith_cos).reshape((len(zenith_cos),) + (1,) * np.ndim(N + lngHour + sinLat))
+
+    T = []
+
+    # rise then set
+    for i in range(2):
+        # approximate time
+        t = N + (((6 + (12 * i)) - lngHour) / 24)
+
+        # 3 calculate the Sun's Mean Anomaly
+        M = (0.9856 * t) - 3.289
+
+        # 4 calculate the Sun's true longitude in range [0,360)
+        L = (M + (1.916 * np.sin(np.radians(M))) + (0.020 * np.sin(np.radians(2 * M))) + 282.634) % 360
+
+        # 5 calculate the Sun's right ascension, in the same quadrant as L and in hours
+        RA = np.degrees(np.arctan(0.91764 * np.tan(np.radians(L))))
+        RA = (RA + ((np.floor(L / 90) * 90) - (np.floor(RA / 90) * 90))) / 15
+
+        # 6 calculate the Sun's declination
+        sinDec = 0.39782 * np.sin(np.radians(L))
+        cosDec = np.cos(np.arcsin(sinDec))
+
+        # 7 calculate the Sun's local hour angle, in hours - NaN where it doesn't rise / set
+        cosH = (zenith - (sinDec * sinLat)) / (cosDec * cosLat)
+        H = np.degrees(np.arccos(np.clip(cosH,-1,1))) / 15
+
+        if i == 0:
+            H = 24 - H
+
+        H = np.where(np.abs(cosH) > 1,np.nan,H)
+
+        # 8 - 10 local mean time of rising / setting, adjusted to UTC in the range [0,24) then to local time
+        T.append((((H + RA - (0.06571 * t) - 6.622) - lngHour) % 24) + offset)
+
+    return({zenith_labels[j]:(T[0][j],T[1][j]) for j in range(len(zenith_labels))})
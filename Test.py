@@ -1,13 +1,8 @@
-import board
-
-from adafruit_ht16k33 import matrix
 from time import sleep
 
 import Config
 import BST
 
-i2c = board.I2C()
-
 # create the object which is the matrix of segments
 SegMatrix = []
 